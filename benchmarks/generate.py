@@ -0,0 +1,245 @@
+# writes valid synthetic files for every format of the toolkit, text is
+# encoded with the codec of a bundled profile
+#
+# usage: python benchmarks/generate.py <out_dir> [--entries N] [--size bytes]
+#        [--game GATE] [--seed 0]
+from pathlib import Path
+import argparse
+import os
+import random
+import sys
+import zlib
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils import EndianBinaryFileWriter, load_profile  # noqa: E402
+
+SFP_TYPES = ["info", "skeleton", "atlas", "image", "audio"]
+
+
+def random_bytes(rnd: random.Random, size: int) -> bytes:
+    # half random, half repeated data, to get a realistic zlib ratio
+    half = size // 2
+    return (
+        rnd.randbytes(half)
+        + bytes(rnd.randrange(16) for _ in range(64)) * ((size - half) // 64)
+        + bytes((size - half) % 64)
+    )
+
+
+def random_text(rnd: random.Random, profile, length: int) -> str:
+    chars = [char for char in profile.font if char not in "<>\n\r"]
+    tags = [
+        (name, arg_count)
+        for op, (name, arg_count) in profile.op_codes.items()
+        if not (op == 4 and profile.settings["asymetrical_color_code"])
+    ]
+    out = []
+    for _ in range(length):
+        k = rnd.random()
+        if k < 0.9:
+            out.append(rnd.choice(chars))
+        elif k < 0.95:
+            out.append("\n")
+        else:
+            name, arg_count = rnd.choice(tags)
+            if arg_count == 0:
+                out.append(f"<{name}>")
+            else:
+                args = ",".join(str(rnd.randrange(256)) for _ in range(arg_count))
+                out.append(f"<{name}:{args}>")
+    return "".join(out)
+
+
+def random_entry(rnd: random.Random, profile) -> bytes:
+    out = bytearray()
+    codec = profile.codec
+    if rnd.random() < 0.3:  # UI text
+        text = random_text(rnd, profile, rnd.randrange(1, 30))
+        while text[0] == "<":
+            text = random_text(rnd, profile, rnd.randrange(1, 30))
+        codec.encode(text, out)
+    else:  # dialogue
+        out.append(1)
+        codec.encode(random_text(rnd, profile, rnd.randrange(0, 6)), out)
+        out.append(2)
+        codec.encode(random_text(rnd, profile, rnd.randrange(10, 80)), out)
+    out.append(0xFF)
+    return bytes(out)
+
+
+def generate_msb(path: str, game_code: str, entry_count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    profile = load_profile(game_code)
+    entries = [random_entry(rnd, profile) for _ in range(entry_count)]
+    with EndianBinaryFileWriter(path) as f:
+        f.write(b"MES\x00")
+        f.write_UInt32(0)
+        f.write_UInt32(entry_count)
+        f.write_UInt32(16 + 8 * entry_count)
+        offset = 0
+        for entry in entries:
+            f.write_UInt32(rnd.randrange(1000))
+            f.write_UInt32(offset)
+            offset += len(entry)
+        f.write(b"".join(entries))
+
+
+def generate_scx(path: str, game_code: str, entry_count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    profile = load_profile(game_code)
+    entries = [random_entry(rnd, profile) for _ in range(entry_count)]
+    script_data = rnd.randbytes(16 * entry_count)
+    unk_table_data = rnd.randbytes(4 * entry_count)
+    text_table_offset = 12 + len(script_data)
+    unk_table_offset = text_table_offset + 4 * entry_count
+    with EndianBinaryFileWriter(path) as f:
+        f.write(b"SC3\x00")
+        f.write_UInt32(text_table_offset)
+        f.write_UInt32(unk_table_offset)
+        f.write(script_data)
+        offset = unk_table_offset + len(unk_table_data)
+        for entry in entries:
+            f.write_UInt32(offset)
+            offset += len(entry)
+        f.write(unk_table_data)
+        f.write(b"".join(entries))
+
+
+def generate_mpk(path: str, entry_count: int, size: int, seed: int = 0):
+    # size is the total uncompressed size of the files
+    rnd = random.Random(seed)
+    with EndianBinaryFileWriter(path) as f:
+        f.write(b"MPK\x00")
+        f.write_UInt16(0)
+        f.write_UInt16(2)
+        f.write_UInt64(entry_count)
+        f.pad(0x40)
+        f.write(bytes(0x100 * entry_count))
+        for idx in range(entry_count):
+            data = random_bytes(rnd, size // entry_count)
+            compress_flag = idx % 4 != 0
+            stored = zlib.compress(data) if compress_flag else data
+            f.pad(0x800)
+            offset = f.tell()
+            f.write(stored)
+            f.seek(0x40 + 0x100 * idx)
+            f.write_UInt32(compress_flag)
+            f.write_UInt32(idx)
+            f.write_UInt64(offset)
+            f.write_UInt64(len(stored))
+            f.write_UInt64(len(data))
+            f.write(f"dir{idx % 8}/file{idx}.bin".encode().ljust(0xE0, b"\x00"))
+            f.seek(0, 2)
+
+
+def generate_sfp(path: str, entry_count: int, size: int, seed: int = 0):
+    rnd = random.Random(seed)
+    with EndianBinaryFileWriter(path) as f:
+        f.write(b"MGBDSPFT")
+        f.write_UInt32(0)
+        f.write_UInt32(entry_count)
+        f.write(bytes(0x10 * entry_count))
+        for idx in range(entry_count):
+            data = random_bytes(rnd, size // entry_count)
+            f.pad(0x10)
+            offset = f.tell()
+            f.write(data)
+            f.seek(0x10 + 0x10 * idx)
+            f.write_UInt32(offset)
+            f.write_UInt32(len(data))
+            f.write(SFP_TYPES[idx % len(SFP_TYPES)].encode().ljust(8, b"\x00"))
+            f.seek(0, 2)
+
+
+def generate_mft(path: str, glyph_count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    glyph_width = glyph_height = 32
+    glyph_data = random_bytes(rnd, glyph_width * glyph_height * glyph_count)
+    compressed = zlib.compress(glyph_data)
+    header_size = 0x40
+    with EndianBinaryFileWriter(path) as f:
+        f.write(b"MFNT")
+        f.write_UInt16(0)
+        f.write_UInt16(0)
+        f.write_UInt16(glyph_width)
+        f.write_UInt16(glyph_height)
+        f.write_UInt32(len(compressed))
+        offset2 = header_size + 2 * glyph_count
+        offset4 = offset2 + 2 * glyph_count
+        for offset, count in [
+            (header_size, glyph_count),
+            (offset2, glyph_count),
+            (offset4, 0),
+            (offset4, glyph_count),
+            (offset4, 0),
+            (offset4, 0),
+        ]:
+            f.write_UInt32(offset)
+            f.write_UInt32(count)
+        f.pad(header_size)
+        for idx in range(glyph_count):
+            f.write_UInt16(idx)
+        for idx in range(glyph_count):
+            f.write_UInt16(idx)
+        f.write(compressed)
+
+
+def generate_infinity_font(path: str, game_code: str, seed: int = 0):
+    # one glyph per char of the profile font
+    rnd = random.Random(seed)
+    glyph_count = len(load_profile(game_code).font)
+    with EndianBinaryFileWriter(path) as f:
+        for idx in range(glyph_count):
+            for value in [0, 0, (idx % 64) * 24, (idx // 64) * 24, 22, 22, 24, 24]:
+                f.write_Int16(value + rnd.randrange(2))
+
+
+def generate_all(
+    out_dir: str,
+    entry_count: int = 10000,
+    size: int = 0x4000000,
+    game_code: str = "GATE",
+    seed: int = 0,
+) -> dict:
+    # returns the path of the file generated for each format
+    out_dir = Path(out_dir).resolve()
+    out_dir.mkdir(exist_ok=True, parents=True)
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # profiles are loaded from the repository
+    try:
+        paths = {
+            "mpk": out_dir / "bench.mpk",
+            "msb": out_dir / "bench.msb",
+            "scx": out_dir / "bench.scx",
+            "sfp": out_dir / "bench.sfp",
+            "mft": out_dir / "bench.mft",
+            "infinityFont": out_dir / "bench_font.bin",
+        }
+        generate_mpk(paths["mpk"], max(entry_count // 100, 1), size, seed)
+        generate_msb(paths["msb"], game_code, entry_count, seed)
+        generate_scx(paths["scx"], game_code, entry_count, seed)
+        generate_sfp(paths["sfp"], max(entry_count // 1000, 1) * 5, size // 4, seed)
+        generate_mft(paths["mft"], min(entry_count, 8192), seed)
+        generate_infinity_font(paths["infinityFont"], "Ever17", seed)
+    finally:
+        os.chdir(cwd)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write synthetic files")
+    parser.add_argument("out_dir")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=0x4000000)
+    parser.add_argument("--game", default="GATE")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = generate_all(args.out_dir, args.entries, args.size, args.game, args.seed)
+    for name, path in paths.items():
+        print(f"{name}: {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+# runs the parse/decode/encode/compress/save steps of every format on the
+# synthetic files of generate.py, and reports MB/s and entries/s
+#
+# usage: python benchmarks/run.py [--entries N] [--size bytes] [--repeat N]
+#        [--only mpk,msb,...] [--json out.json] [--compare old.json]
+from pathlib import Path
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from generate import generate_all  # noqa: E402
+from utils import load_profile  # noqa: E402
+
+GAME_CODE = "GATE"
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_mpk(path: Path, out_dir: Path, repeat: int):
+    from mpk import MPK
+
+    def parse():
+        MPK(path).close()
+
+    with MPK(path) as mpk:
+        entries = [entry for entry in mpk.entries if entry.filepath != ""]
+        files = [entry.read_file() for entry in entries]
+        size = sum(len(data) for data in files)
+
+        def decompress():
+            for entry in entries:
+                entry.read_file()
+
+        def compress():
+            for entry, data in zip(entries, files):
+                entry.import_data(data, -1)
+
+        # only the header and the TOC are read
+        toc_size = 0x40 + 0x100 * len(mpk.entries)
+        yield "parse", best_time(parse, repeat), toc_size, len(entries)
+        yield "decompress", best_time(decompress, repeat), size, len(entries)
+        yield "compress", best_time(compress, repeat), size, len(entries)
+        out_path = out_dir / "out.mpk"
+        seconds = best_time(lambda: mpk.save(out_path), repeat)
+        yield "save", seconds, out_path.stat().st_size, len(entries)
+
+
+def bench_text(text_class, path: Path, out_dir: Path, repeat: int):
+    text = text_class(path, GAME_CODE)
+    seconds = best_time(lambda: text_class(path, GAME_CODE), repeat)
+    size = path.stat().st_size
+    count = len(text.entries)
+    yield "decode", seconds, size, count
+
+    def encode():
+        out = bytearray()
+        for entry in text.entries:
+            raw = entry.raw
+            entry.raw = None  # force the codec instead of the original bytes
+            entry.write_bytes(out)
+            entry.raw = raw
+
+    yield "encode", best_time(encode, repeat), size, count
+    out_path = out_dir / ("out" + path.suffix)
+    yield "save", best_time(lambda: text.save(out_path), repeat), size, count
+
+
+def bench_sfp(path: Path, out_dir: Path, repeat: int):
+    from sfp import SFP
+
+    sfp = SFP(path)
+    size = path.stat().st_size
+    count = len(sfp.entries)
+    yield "parse", best_time(lambda: SFP(path), repeat), size, count
+    yield "save", best_time(lambda: sfp.save(out_dir / "out.sfp"), repeat), size, count
+
+
+def bench_mft(path: Path, out_dir: Path, repeat: int):
+    from mft import MFT
+
+    mft = MFT(path)
+    seconds = best_time(lambda: MFT(path), repeat)
+    yield "parse", seconds, len(mft.glyph_data), mft.count4
+
+
+def bench_infinity_font(path: Path, out_dir: Path, repeat: int):
+    from infinityFont import InfinityFont
+
+    font = InfinityFont(path, "Ever17")
+    size = path.stat().st_size
+    count = len(font.glyphs)
+    json_path = out_dir / "font.json"
+    yield "parse", best_time(lambda: InfinityFont(path, "Ever17"), repeat), size, count
+    yield "export", best_time(lambda: font.export_json(json_path), repeat), size, count
+    seconds = best_time(lambda: InfinityFont(json_path, "Ever17"), repeat)
+    yield "import", seconds, size, count
+    seconds = best_time(lambda: font.write(out_dir / "out.bin"), repeat)
+    yield "save", seconds, size, count
+
+
+def get_benchmarks() -> dict:
+    from msb import MSB
+    from scx import SCX
+
+    return {
+        "mpk": bench_mpk,
+        "msb": lambda *args: bench_text(MSB, *args),
+        "scx": lambda *args: bench_text(SCX, *args),
+        "sfp": bench_sfp,
+        "mft": bench_mft,
+        "infinityFont": bench_infinity_font,
+    }
+
+
+def get_commit() -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def print_comparison(results: list, old_path: str):
+    with open(old_path, mode="r", encoding="utf-8") as f:
+        old = {
+            (result["format"], result["step"]): result
+            for result in json.load(f)["results"]
+        }
+    print(f"\nCompared to {old_path}:")
+    for result in results:
+        previous = old.get((result["format"], result["step"]))
+        if previous is not None:
+            ratio = previous["seconds"] / result["seconds"]
+            print(f"{result['format']:<13} {result['step']:<11} {ratio:6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark every format on synthetic files"
+    )
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--size", type=int, default=0x4000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", type=lambda value: value.split(","))
+    parser.add_argument("--json", metavar="OUT", help="write the results")
+    parser.add_argument("--compare", metavar="OLD", help="compare to saved results")
+    args = parser.parse_args()
+    entry_count = args.entries
+    size = args.size
+    repeat = args.repeat
+    only = args.only
+    out = args.json
+    compare = args.compare
+
+    os.chdir(ROOT)  # profiles are loaded from the repository
+    load_profile(GAME_CODE)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print("Generating files...")
+        paths = generate_all(Path(tmp_dir), entry_count, size, GAME_CODE)
+        print(
+            f"{'format':<13} {'step':<11} {'seconds':>9} {'MB/s':>9} {'entries/s':>11}"
+        )
+        for name, bench in get_benchmarks().items():
+            if only is not None and name not in only:
+                continue
+            for step, seconds, step_size, count in bench(
+                paths[name], Path(tmp_dir), repeat
+            ):
+                result = {
+                    "format": name,
+                    "step": step,
+                    "seconds": seconds,
+                    "bytes": step_size,
+                    "entries": count,
+                    "mb_s": step_size / 1e6 / seconds,
+                    "entries_s": count / seconds,
+                }
+                results.append(result)
+                print(
+                    f"{name:<13} {step:<11} {seconds:9.4f} {result['mb_s']:9.1f}"
+                    f" {result['entries_s']:11.0f}"
+                )
+
+    if out is not None:
+        report = {
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "entries": entry_count,
+            "size": size,
+            "repeat": repeat,
+            "results": results,
+        }
+        with open(out, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    if compare is not None:
+        print_comparison(results, compare)
+
+
+if __name__ == "__main__":
+    main()
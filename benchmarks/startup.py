@@ -0,0 +1,100 @@
+# measures the startup time of the command line tools, and checks that the
+# heavy dependencies are only imported by the commands that need them
+#
+# usage: python benchmarks/startup.py [-n runs] [--max-ms ms] [--json out.json]
+from pathlib import Path
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["PIL", "pandas", "numpy", "openpyxl", "pyarrow"]
+MODULES = [
+    "mages",
+    "mpk",
+    "msb",
+    "scx",
+    "search",
+    "sfp",
+    "mft",
+    "infinityFont",
+    "FDCFont",
+]
+COMMANDS = [
+    ["mages.py", "--help"],
+    ["mages.py", "mpk", "export", "--help"],
+    ["mages.py", "msb", "export", "--help"],
+    ["mages.py", "fonts", "infinity", "export", "--help"],
+]
+
+
+def time_command(args: list, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args], cwd=ROOT, check=True, stdout=subprocess.DEVNULL
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def imported_modules(module: str) -> set:
+    # top level packages imported by "import module", from -X importtime
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    names = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            names.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the startup time of the command line tools"
+    )
+    parser.add_argument("-n", dest="runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, help="fail above this overhead")
+    parser.add_argument("--json", metavar="OUT", help="write the results")
+    args = parser.parse_args()
+    runs = args.runs
+    max_ms = args.max_ms
+    out = args.json
+
+    failed = []
+    results = {"python_ms": time_command(["-c", "pass"], runs), "commands": {}}
+    print(f"{'python -c pass':<45} {results['python_ms']:8.1f} ms")
+    for command in COMMANDS:
+        name = " ".join(command)
+        ms = time_command(command, runs)
+        results["commands"][name] = ms
+        print(f"{name:<45} {ms:8.1f} ms")
+        if max_ms is not None and ms - results["python_ms"] > max_ms:
+            failed.append(f"{name} takes {ms:.1f} ms")
+
+    results["heavy_imports"] = {}
+    for module in MODULES:
+        heavy = sorted(imported_modules(module) & set(HEAVY_MODULES))
+        results["heavy_imports"][module] = heavy
+        if len(heavy) != 0:
+            failed.append(f"import {module} loads {', '.join(heavy)}")
+
+    if out is not None:
+        with open(out, mode="w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1)
+    for message in failed:
+        print(f"Error: {message}")
+    sys.exit(1 if len(failed) != 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
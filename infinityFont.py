@@ -4,11 +4,14 @@ from utils import (
     load_font_txt,
     write_font_txt,
 )
-from PIL import Image
 from pathlib import Path
+from typing import TYPE_CHECKING
 import json
 import sys
 
+if TYPE_CHECKING:
+    from PIL import Image
+
 
 class InfinityFont:
     def __init__(self, filepath: str, game_code: str):
@@ -25,6 +28,8 @@ class InfinityFont:
                 ]
 
     def reorganize_font(self, out_path: str, font_sheet_filepath: str):
+        from PIL import Image
+
         with Image.open(font_sheet_filepath) as font_sheet:
             max_height = int(max(self.glyphs, key=lambda e: e.height).height * 1.5)
             max_width = int(max(self.glyphs, key=lambda e: e.width).width * 1.5)
@@ -81,7 +86,7 @@ class FontGlyph:
         elif isinstance(f, dict):
             self.from_dict(f)
 
-    def get_glyph_im(self, font_sheet: Image.Image):
+    def get_glyph_im(self, font_sheet: "Image.Image"):
         return font_sheet.crop(
             (self.x_pos, self.y_pos, self.x_pos + self.width, self.y_pos + self.height)
         )
@@ -0,0 +1,313 @@
+from importlib import import_module
+import argparse
+import sys
+
+# single entry point for all the tools, the format modules (and their
+# dependencies like pillow or openpyxl) are only imported by the command
+# that needs them
+
+
+def mpk_export(args):
+    mpk = import_module("mpk")
+    mpk.batch_export_mpk(
+        args.mpk_dir, args.output_dir, args.jobs, args.include, args.exclude
+    )
+
+
+def mpk_import(args):
+    mpk = import_module("mpk")
+    mpk.batch_import_mpk(
+        args.mpk_dir, args.output_dir, args.jobs, args.level, args.in_place
+    )
+
+
+def mpk_index(args):
+    mpk = import_module("mpk")
+    with mpk.MPKIndex(args.mpk_dir) as index:
+        print(f"Indexed {index.refresh()} archive(s).")
+
+
+def mpk_extract(args):
+    mpk = import_module("mpk")
+    with mpk.MPKIndex(args.mpk_dir) as index:
+        index.refresh()
+        index.extract_file(args.file_path, args.output_file_path)
+
+
+def mpk_cat(args):
+    mpk = import_module("mpk")
+    with mpk.MPKIndex(args.mpk_dir) as index:
+        index.refresh()
+        sys.stdout.buffer.write(index.read_file(args.file_path))
+
+
+def mpk_replace(args):
+    mpk = import_module("mpk")
+    with mpk.MPKIndex(args.mpk_dir) as index:
+        index.refresh()
+        index.replace_file(args.file_path, args.new_file_path, args.level)
+
+
+def text_export(args):
+    text = import_module(args.command)
+    text.batch_export(
+        args.game_code,
+        args.input_dir,
+        args.output_dir,
+        args.jobs,
+        args.format,
+        args.unique,
+    )
+
+
+def text_import(args):
+    text = import_module(args.command)
+    text.batch_import(
+        args.game_code,
+        args.input_dir,
+        args.output_dir,
+        args.jobs,
+        args.format,
+        args.unique,
+    )
+
+
+def text_speakers(args):
+    text = import_module(args.command)
+    text.convert_speakers(args.output_dir, args.speakers_path, args.jobs)
+
+
+def search_index(args):
+    search = import_module("search")
+    with search.TextIndex(args.text_dir, args.game_code) as index:
+        print(f"Indexed {index.refresh(args.jobs)} file(s).")
+
+
+def search_query(args):
+    search = import_module("search")
+    with search.TextIndex(args.text_dir, args.game_code) as index:
+        index.refresh(args.jobs)
+        search.print_results(index.search(args.query, args.speaker, args.limit))
+
+
+def sfp_export(args):
+    import_module("sfp").batch_export_sfp(args.sfp_dir, args.output_dir)
+
+
+def sfp_import(args):
+    import_module("sfp").batch_import_sfp(args.sfp_dir, args.output_dir)
+
+
+def mft_export(args):
+    import_module("mft").export_mft(args.mft_path, args.png_path)
+
+
+def infinity_export(args):
+    font = import_module("infinityFont").InfinityFont(args.font_path, args.game_code)
+    font.export_json(args.json_path)
+    print(f"Successfully exported font to {args.json_path}!")
+
+
+def infinity_import(args):
+    font = import_module("infinityFont").InfinityFont(args.json_path, args.game_code)
+    font.write(args.font_path)
+    font.export_font_txt()
+    print(
+        f"Successfully wrote new font to {args.font_path} and imported new characters to font.txt!"
+    )
+
+
+def fdc_export(args):
+    fdc = import_module("FDCFont")
+    fdc.export_font_metrics(args.game_code, args.elf_path, args.json_path)
+    print(f"Successfully exported font to {args.json_path}!")
+
+
+def fdc_import(args):
+    fdc = import_module("FDCFont")
+    fdc.import_font_metrics(args.game_code, args.json_path, args.elf_path)
+    print(
+        f"Successfully imported new font to {args.elf_path} and imported new characters to font.txt!"
+    )
+
+
+def add_command(subparsers, name: str, func, arguments: list, help: str):
+    parser = subparsers.add_parser(name, help=help)
+    for argument in arguments:
+        parser.add_argument(argument)
+    parser.set_defaults(func=func)
+    return parser
+
+
+def add_mpk_parser(subparsers):
+    parser = subparsers.add_parser("mpk", help="mpk archives")
+    commands = parser.add_subparsers(dest="action", required=True)
+    export = add_command(
+        commands, "export", mpk_export, ["mpk_dir", "output_dir"], "extract archives"
+    )
+    export.add_argument("-j", "--jobs", type=int, default=1)
+    export.add_argument("--include", action="append", default=[])
+    export.add_argument("--exclude", action="append", default=[])
+    imp = add_command(
+        commands, "import", mpk_import, ["mpk_dir", "output_dir"], "rebuild archives"
+    )
+    imp.add_argument("-j", "--jobs", type=int, default=1)
+    imp.add_argument(
+        "--level", type=int, default=-1, choices=range(-1, 10), metavar="0-9"
+    )
+    imp.add_argument("--in-place", action="store_true")
+    add_command(commands, "index", mpk_index, ["mpk_dir"], "index archives")
+    add_command(
+        commands,
+        "extract",
+        mpk_extract,
+        ["mpk_dir", "file_path", "output_file_path"],
+        "extract a single file",
+    )
+    add_command(
+        commands, "cat", mpk_cat, ["mpk_dir", "file_path"], "print a single file"
+    )
+    replace = add_command(
+        commands,
+        "replace",
+        mpk_replace,
+        ["mpk_dir", "file_path", "new_file_path"],
+        "replace a single file in place",
+    )
+    replace.add_argument(
+        "--level", type=int, default=-1, choices=range(-1, 10), metavar="0-9"
+    )
+
+
+def add_text_parser(subparsers, name: str, help: str):
+    # the table formats are listed here to avoid importing utils for --help
+    formats = ["xlsx", "tsv", "jsonl", "parquet", "db"]
+    parser = subparsers.add_parser(name, help=help)
+    commands = parser.add_subparsers(dest="action", required=True)
+    for action, func in [("export", text_export), ("import", text_import)]:
+        command = add_command(
+            commands,
+            action,
+            func,
+            ["game_code", "input_dir", "output_dir"],
+            f"{action} the text of {name} files",
+        )
+        command.add_argument("-j", "--jobs", type=int, default=1)
+        command.add_argument("--format", default="xlsx", choices=formats)
+        command.add_argument(
+            "--unique", action="store_true", help="one row per unique string"
+        )
+    speakers = add_command(
+        commands,
+        "speakers",
+        text_speakers,
+        ["output_dir", "speakers_path"],
+        "translate the nametags in all the exported files",
+    )
+    speakers.add_argument("-j", "--jobs", type=int, default=1)
+
+
+def add_search_parser(subparsers):
+    parser = subparsers.add_parser("search", help="search the text of msb/scx files")
+    commands = parser.add_subparsers(dest="action", required=True)
+    index = add_command(
+        commands,
+        "index",
+        search_index,
+        ["game_code", "text_dir"],
+        "index the text of a directory",
+    )
+    index.add_argument("-j", "--jobs", type=int, default=1)
+    query = add_command(
+        commands,
+        "query",
+        search_query,
+        ["game_code", "text_dir"],
+        "print the entries containing a text",
+    )
+    query.add_argument("query", nargs="?", default="")
+    query.add_argument("--speaker")
+    query.add_argument("--limit", type=int, default=100)
+    query.add_argument("-j", "--jobs", type=int, default=1)
+
+
+def add_font_parser(subparsers):
+    parser = subparsers.add_parser("fonts", help="Infinity and FDC fonts")
+    kinds = parser.add_subparsers(dest="kind", required=True)
+    infinity = kinds.add_parser("infinity", help="Ever17 and Never7 font.bin")
+    commands = infinity.add_subparsers(dest="action", required=True)
+    add_command(
+        commands,
+        "export",
+        infinity_export,
+        ["game_code", "font_path", "json_path"],
+        "export glyphs mapping to json",
+    )
+    add_command(
+        commands,
+        "import",
+        infinity_import,
+        ["game_code", "json_path", "font_path"],
+        "write a new font.bin and update font.txt",
+    )
+    fdc = kinds.add_parser("fdc", help="Famicom Detective 1 & 2 main.elf")
+    commands = fdc.add_subparsers(dest="action", required=True)
+    add_command(
+        commands,
+        "export",
+        fdc_export,
+        ["game_code", "elf_path", "json_path"],
+        "export glyphs mapping to json",
+    )
+    add_command(
+        commands,
+        "import",
+        fdc_import,
+        ["game_code", "json_path", "elf_path"],
+        "import glyphs mapping to main.elf and update font.txt",
+    )
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog="mages", description="Tools for the MAGES engine file formats"
+    )
+    parser.add_argument(
+        "--timings", metavar="JSON", help="write the time spent in each phase"
+    )
+    parser.add_argument(
+        "--profile", metavar="PROF", help="write a cProfile of the main process"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    add_mpk_parser(subparsers)
+    add_text_parser(subparsers, "msb", "msb text files")
+    add_text_parser(subparsers, "scx", "scx script files")
+    add_search_parser(subparsers)
+    sfp = subparsers.add_parser("sfp", help="sfp archives")
+    commands = sfp.add_subparsers(dest="action", required=True)
+    add_command(
+        commands, "export", sfp_export, ["sfp_dir", "output_dir"], "extract archives"
+    )
+    add_command(
+        commands, "import", sfp_import, ["sfp_dir", "output_dir"], "rebuild archives"
+    )
+    mft = subparsers.add_parser("mft", help="mft fonts")
+    commands = mft.add_subparsers(dest="action", required=True)
+    add_command(
+        commands, "export", mft_export, ["mft_path", "png_path"], "export the glyphs"
+    )
+    add_font_parser(subparsers)
+    return parser
+
+
+def main(argv: list = None):
+    args = get_parser().parse_args(argv)
+    if args.timings is None and args.profile is None:
+        args.func(args)
+        return
+    with import_module("utils").instrumented(args.timings, args.profile):
+        args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 from utils import EndianBinaryFileReader
-from PIL import Image
 import zlib
 import sys
 
@@ -48,6 +47,8 @@ class MFT:
             self.glyph_data = zlib.decompress(f.read(self.compressed_datasize))
 
     def export_glyphs(self, out_path: str):
+        from PIL import Image
+
         width = 64 * self.glyph_width
         height = (self.count2 // 64) * self.glyph_height
         if self.count2 % 64 != 0:
@@ -1,127 +1,681 @@
-from utils import EndianBinaryFileReader, EndianBinaryFileWriter, has_correct_suffix
+from utils import (
+    EndianBinaryMappedReader,
+    EndianBinaryFileWriter,
+    EndianBinaryFileUpdater,
+    Manifest,
+    copy_file_range,
+    file_stamp,
+    has_correct_suffix,
+    instrumented,
+    is_unchanged,
+    new_hash,
+    path_filter,
+    pop_flag,
+    pop_option,
+    pop_options,
+    run_jobs,
+    timings,
+)
+from array import array
+from bisect import bisect_right
+from contextlib import ExitStack
 from pathlib import Path
+import sqlite3
+import struct
 import zlib
 import sys
+import os
+import time
 
 MAGIC = b"MPK\x00"
+CHUNK_SIZE = 0x100000
+MANIFEST_NAME = "mpk_manifest.json"
+INDEX_NAME = "mpk_index.db"
+TOC_RECORD = struct.Struct("<IIQQQ224s")
 
 
 class MPK:
     def __init__(self, filepath: str):
-        with EndianBinaryFileReader(filepath) as f:
-            self.filepath = filepath
-            f.check_magic(MAGIC)
-            self.unk1 = f.read_UInt16()
-            self.unk2 = f.read_UInt16()
-            self.entry_count = f.read_UInt64()
-            self.padding = f.read(0x30)
-            self.entries = [MPKEntry(f) for _ in range(self.entry_count)]
-
-    def unpack(self, extract_dir: str):
-        for entry in self.entries:
-            if entry.filepath != "":
-                print(f"Extracting {entry.filepath} from {self.filepath}...")
-                extract_path = Path(extract_dir) / entry.filepath
-                extract_path.parent.mkdir(exist_ok=True, parents=True)
-                entry.write_file(extract_path)
+        self.filepath = filepath
+        self.load()
+
+    def load(self):
+        start = time.perf_counter()
+        self.file = EndianBinaryMappedReader(
+            self.filepath
+        )  # payloads are read on demand
+        f = self.file
+        f.check_magic(MAGIC)
+        self.unk1 = f.read_UInt16()
+        self.unk2 = f.read_UInt16()
+        self.entry_count = f.read_UInt64()
+        self.padding = f.read(0x30)
+        self.entries = MPKEntries(f, f.read(TOC_RECORD.size * self.entry_count))
+        timings.add(
+            "toc_parse",
+            time.perf_counter() - start,
+            TOC_RECORD.size * self.entry_count,
+            self.entry_count,
+            Path(self.filepath).name,
+        )
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_extract_tasks(self, extract_dir: str, accept=None) -> list:
+        # accept filters the entry paths, see utils.path_filter
+        return [
+            (self.entries[idx], Path(extract_dir) / filepath)
+            for idx, filepath in enumerate(self.entries.filepaths)
+            if filepath != "" and (accept is None or accept(Path(filepath).as_posix()))
+        ]
+
+    def unpack(self, extract_dir: str, jobs: int = 1, accept=None):
+        extract_entries(self.get_extract_tasks(extract_dir, accept), jobs)
 
-    def import_files(self, dir: str):
+    def import_files(
+        self, dir: str, jobs: int = 1, level: int = -1, records: dict | None = None
+    ) -> list:
+        # records are the manifest entries of the archive, matching files are skipped
+        tasks = [
+            (self.entries[idx], Path(dir) / filepath, level)
+            for idx, filepath in enumerate(self.entries.filepaths)
+            if filepath != ""
+            and Path(dir, filepath).is_file()
+            and not (
+                records is not None
+                and is_unchanged(
+                    records.get(Path(filepath).as_posix()), Path(dir, filepath)
+                )
+            )
+        ]
+        start = time.perf_counter()
+        imported = []
+        failed = 0
+        # zlib releases the GIL, so compression scales with threads
+        for task, digest, error in run_jobs(import_entry, tasks, jobs):
+            entry, lookup_path, _ = task
+            if error is None:
+                print(f"Imported {lookup_path} to {self.filepath}")
+                imported.append((entry, lookup_path, digest))
+            else:
+                print(
+                    f"Error while importing {lookup_path} to {self.filepath}: {error}"
+                )
+                failed += 1
+        if failed != 0:
+            raise Exception(f"Error: {failed} file(s) could not be imported")
+        self.print_compression_report(
+            [entry for entry, _, _ in tasks], time.perf_counter() - start
+        )
+        return imported
+
+    def print_compression_report(self, entries: list, duration: float):
+        compressed = [entry for entry in entries if entry.compress_flag == 1]
+        if len(compressed) == 0:
+            return
+        in_size = sum(entry.uncompressed_data_size for entry in compressed)
+        out_size = sum(entry.compressed_data_size for entry in compressed)
+        ratio = out_size / in_size if in_size != 0 else 1
+        print(
+            f"Compressed {len(compressed)} file(s) for {self.filepath} in {duration:.2f}s: "
+            f"{in_size} -> {out_size} bytes ({ratio:.1%})"
+        )
+
+    def get_layout(self) -> list[int]:
+        offsets = []
+        offset = 0x40 + 0x100 * self.entry_count
         for entry in self.entries:
-            lookup_path = Path(dir) / entry.filepath
-            if lookup_path.exists():
-                print(f"Importing {lookup_path} to {self.filepath}...")
-                newdata = lookup_path.read_bytes()
-                entry.import_data(newdata)
+            offset += -offset % 0x800
+            offsets.append(offset)
+            offset += entry.compressed_data_size
+        return offsets
 
     def save(self, filepath: str):
-        with EndianBinaryFileWriter(filepath) as f:
-            f.write(MAGIC)
-            f.write_UInt16(self.unk1)
-            f.write_UInt16(self.unk2)
-            f.write_UInt64(self.entry_count)
-            f.write(self.padding)
-            for entry in self.entries:
-                entry.write_info(f)
-            for idx, entry in enumerate(self.entries):
-                f.pad(0x800)
-                offset = f.tell()
-                f.write(entry.data)
-                f.seek(0x48 + 0x100 * idx)
-                f.write_UInt64(offset)
-                f.seek(0, 2)
+        # never truncate the archive we are reading from, write next to it and swap
+        start = time.perf_counter()
+        layout = self.get_layout()
+        tmp_path = Path(filepath).with_name(Path(filepath).name + ".tmp")
+        try:
+            with EndianBinaryFileWriter(tmp_path) as f:
+                f.write(MAGIC)
+                f.write_UInt16(self.unk1)
+                f.write_UInt16(self.unk2)
+                f.write_UInt64(self.entry_count)
+                f.write(self.padding)
+                for entry, offset in zip(self.entries, layout):
+                    entry.write_info(f, offset)
+                for entry in self.entries:
+                    f.pad(0x800)
+                    entry.write_data(f)
+                size = f.tell()
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        timings.add(
+            "write",
+            time.perf_counter() - start,
+            size,
+            self.entry_count,
+            Path(filepath).name,
+        )
+        is_source = Path(filepath).resolve() == Path(self.filepath).resolve()
+        if is_source:
+            self.close()
+        os.replace(tmp_path, filepath)
+        if is_source:
+            self.load()
+
+    def get_slot_sizes(self) -> list[int]:
+        # room between each payload and the next one (or the end of the archive)
+        # as found in the file, so it is read from the TOC columns
+        offsets = self.entries.data_offsets
+        sizes = self.entries.compressed_data_sizes
+        bounds = sorted(
+            {offset for offset, size in zip(offsets, sizes) if size != 0}
+            | {self.file.get_filesize()}
+        )
+        return [
+            bounds[bisect_right(bounds, offset)] - offset if size != 0 else 0
+            for offset, size in zip(offsets, sizes)
+        ]
+
+    def update(self):
+        # patch the modified entries in place when they fit in their slot,
+        # append them at the end of the archive otherwise
+        start = time.perf_counter()
+        slots = self.get_slot_sizes()
+        size = 0
+        count = 0
+        with EndianBinaryFileUpdater(self.filepath) as f:
+            for idx, (entry, slot) in enumerate(zip(self.entries, slots)):
+                if entry.new_data is None:
+                    continue
+                if entry.compressed_data_size <= slot:
+                    f.seek(entry.data_offset)
+                else:
+                    f.seek(0, 2)
+                    f.pad(0x800)
+                    entry.data_offset = f.tell()
+                f.write(entry.new_data)
+                f.seek(0x40 + 0x100 * idx)
+                entry.write_info(f, entry.data_offset)
+                size += len(entry.new_data)
+                count += 1
+        timings.add(
+            "write", time.perf_counter() - start, size, count, Path(self.filepath).name
+        )
+        self.close()
+        self.load()
+
+
+class MPKEntries:
+    # TOC decoded in bulk into columns, MPKEntry objects are built on access
+    def __init__(self, f: EndianBinaryMappedReader, toc: bytes):
+        self.file = f
+        columns = list(zip(*TOC_RECORD.iter_unpack(toc))) or [()] * 6
+        self.compress_flags = array("I", columns[0])
+        self.ids = array("I", columns[1])
+        self.data_offsets = array("Q", columns[2])
+        self.compressed_data_sizes = array("Q", columns[3])
+        self.uncompressed_data_sizes = array("Q", columns[4])
+        self.filepaths = [filepath.decode().strip("\x00") for filepath in columns[5]]
+        self.loaded = {}
+
+    def __len__(self) -> int:
+        return len(self.filepaths)
+
+    def __getitem__(self, idx: int | slice):
+        # same indexing as the list of entries it replaces
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx not in self.loaded:
+            if not 0 <= idx < len(self):
+                raise IndexError("MPK entry index out of range")
+            record = (
+                self.compress_flags[idx],
+                self.ids[idx],
+                self.data_offsets[idx],
+                self.compressed_data_sizes[idx],
+                self.uncompressed_data_sizes[idx],
+                self.filepaths[idx],
+            )
+            self.loaded[idx] = MPKEntry(self.file, record)
+        return self.loaded[idx]
+
+    def __iter__(self):
+        return (self[idx] for idx in range(len(self)))
 
 
 class MPKEntry:
-    def __init__(self, f: EndianBinaryFileReader):
-        self.compress_flag = f.read_UInt32()
-        self.idx = f.read_UInt32()
-        self.data_offset = f.read_UInt64()
-        self.compressed_data_size = f.read_UInt64()
-        self.uncompressed_data_size = f.read_UInt64()
-        self.filepath = f.read(0xE0).decode().strip("\x00")
-        self.read_data(f)
-
-    def read_data(self, f: EndianBinaryFileReader):
-        pos = f.tell()
-        f.seek(self.data_offset)
-        self.data = f.read(self.compressed_data_size)
-        f.seek(pos)
-
-    def import_data(self, newdata: bytes):
+    def __init__(self, f: EndianBinaryMappedReader, record: tuple | None = None):
+        # record is a decoded TOC record, otherwise it is read from f
+        self.file = f
+        if record is None:
+            *record, filepath = TOC_RECORD.unpack(f.read(TOC_RECORD.size))
+            record = (*record, filepath.decode().strip("\x00"))
+        (
+            self.compress_flag,
+            self.idx,
+            self.data_offset,
+            self.compressed_data_size,
+            self.uncompressed_data_size,
+            self.filepath,
+        ) = record
+        self.new_data = None
+
+    @property
+    def data(self) -> bytes | memoryview:
+        if self.new_data is not None:
+            return self.new_data
+        return self.file.view(self.data_offset, self.compressed_data_size)
+
+    @data.setter
+    def data(self, value: bytes):
+        self.new_data = value
+
+    def import_data(self, newdata: bytes, level: int = -1):
         self.uncompressed_data_size = len(newdata)
         match self.compress_flag:
             case 0:
                 self.data = newdata
             case 1:
-                self.data = zlib.compress(newdata)
+                self.data = zlib.compress(newdata, level)
             case _:
                 raise Exception(f"Unsupported compression with id {self.compress_flag}")
         self.compressed_data_size = len(self.data)
 
-    def write_file(self, extract_path: str):
-        match self.compress_flag:
-            case 0:
-                out_data = self.data
-            case 1:
-                out_data = zlib.decompress(self.data)
-            case _:
-                raise Exception(f"Unsupported compression with id {self.compress_flag}")
-        assert (
-            len(out_data) == self.uncompressed_data_size
-        ), "Error: the actual length of the data don't match the expected size"
-        Path(extract_path).write_bytes(out_data)
+    def import_file(self, filepath: str, level: int = -1) -> str:
+        # streamed counterpart of import_data, returns the hash of the file
+        if self.compress_flag not in [0, 1]:
+            raise Exception(f"Unsupported compression with id {self.compress_flag}")
+        compressor = zlib.compressobj(level) if self.compress_flag == 1 else None
+        digest = new_hash()
+        data = bytearray()
+        size = 0
+        read_time = 0.0
+        start = time.perf_counter()
+        with open(filepath, mode="rb") as f:
+            while True:
+                read_start = time.perf_counter()
+                chunk = f.read(CHUNK_SIZE)
+                read_time += time.perf_counter() - read_start
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                data += chunk if compressor is None else compressor.compress(chunk)
+        if compressor is not None:
+            data += compressor.flush()
+        archive = Path(self.file.filepath).name
+        timings.add("read", read_time, size, 1, archive)
+        timings.add(
+            "compress" if compressor is not None else "copy",
+            time.perf_counter() - start - read_time,
+            size,
+            1,
+            archive,
+        )
+        self.data = data
+        self.uncompressed_data_size = size
+        self.compressed_data_size = len(data)
+        return digest.hexdigest()
+
+    def iter_file(self):
+        # yields the uncompressed data in chunks of at most CHUNK_SIZE bytes.
+        # The views of the archive are released even on errors, a traceback
+        # holding them would prevent the archive from being closed
+        data = self.data
+        size = 0
+        try:
+            match self.compress_flag:
+                case 0:
+                    chunks = (
+                        data[pos : pos + CHUNK_SIZE]
+                        for pos in range(0, len(data), CHUNK_SIZE)
+                    )
+                case 1:
+                    chunks = iter_decompress(data)
+                case _:
+                    raise Exception(
+                        f"Unsupported compression with id {self.compress_flag}"
+                    )
+            for chunk in chunks:
+                try:
+                    size += len(chunk)
+                    assert (
+                        size <= self.uncompressed_data_size
+                    ), "Error: the actual length of the data don't match the expected size"
+                    yield chunk
+                except BaseException:
+                    if isinstance(chunk, memoryview):
+                        chunk.release()
+                    raise
+            assert (
+                size == self.uncompressed_data_size
+            ), "Error: the actual length of the data don't match the expected size"
+        finally:
+            if isinstance(data, memoryview):
+                data.release()
+
+    def read_file(self) -> bytes:
+        return b"".join(self.iter_file())
 
-    def write_info(self, f: EndianBinaryFileWriter):
+    def write_file(self, extract_path: str) -> str:
+        # chunks are read from the mapped archive (and decompressed) lazily,
+        # so that time is told apart from the writes. They go to a temporary
+        # file, a failed entry leaves no partial file to be imported back
+        digest = new_hash()
+        write_time = 0.0
+        size = 0
+        start = time.perf_counter()
+        tmp_path = Path(extract_path).with_name(Path(extract_path).name + ".tmp")
+        try:
+            with open(tmp_path, mode="wb") as f:
+                for chunk in self.iter_file():
+                    write_start = time.perf_counter()
+                    f.write(chunk)
+                    write_time += time.perf_counter() - write_start
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        os.replace(tmp_path, extract_path)
+        archive = Path(self.file.filepath).name
+        timings.add(
+            "decompress" if self.compress_flag == 1 else "read",
+            time.perf_counter() - start - write_time,
+            size,
+            1,
+            archive,
+        )
+        timings.add("write", write_time, size, 1, archive)
+        return digest.hexdigest()
+
+    def write_data(self, f: EndianBinaryFileWriter):
+        if self.new_data is not None:
+            f.write(self.new_data)
+        else:  # untouched, let the kernel copy it from the source archive
+            copy_file_range(
+                self.file.file, f.file, self.data_offset, self.compressed_data_size
+            )
+
+    def write_info(self, f: EndianBinaryFileWriter, data_offset: int):
         f.write_UInt32(self.compress_flag)
         f.write_UInt32(self.idx)
-        f.write_UInt64(0)
+        f.write_UInt64(data_offset)
         f.write_UInt64(self.compressed_data_size)
         f.write_UInt64(self.uncompressed_data_size)
         f.write(self.filepath.encode("utf-8"))
         f.write((0xE0 - len(self.filepath)) * b"\x00")
 
 
-def batch_export_mpk(input_dir: str, extracted_dir: str):
-    for path in Path(input_dir).iterdir():
-        if has_correct_suffix(path, ".mpk"):
-            mpk = MPK(path)
-            mpk.unpack(Path(extracted_dir, path.name))
+def iter_decompress(data: bytes):
+    decompressor = zlib.decompressobj()
+    for pos in range(0, len(data), CHUNK_SIZE):
+        with memoryview(data)[pos : pos + CHUNK_SIZE] as chunk:
+            out = decompressor.decompress(chunk, CHUNK_SIZE)
+        yield out
+        while decompressor.unconsumed_tail:
+            yield decompressor.decompress(decompressor.unconsumed_tail, CHUNK_SIZE)
+    yield decompressor.flush()
+
+
+class MPKIndex:
+    # sqlite table of the entries of every archive of a directory, archives are
+    # reindexed when their size or mtime changes
+    def __init__(self, mpk_dir: str):
+        self.mpk_dir = Path(mpk_dir)
+        self.db = sqlite3.connect(self.mpk_dir / INDEX_NAME)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS archives"
+                "(name TEXT PRIMARY KEY, size INTEGER, mtime INTEGER)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS files"
+                "(archive TEXT, toc_idx INTEGER, filepath TEXT, compress_flag INTEGER,"
+                " data_offset INTEGER, compressed_data_size INTEGER,"
+                " uncompressed_data_size INTEGER, PRIMARY KEY (archive, toc_idx))"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS files_filepath ON files(filepath)"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def refresh(self) -> int:
+        stamps = {
+            name: [size, mtime]
+            for name, size, mtime in self.db.execute("SELECT * FROM archives")
+        }
+        archives = [
+            path
+            for path in sorted(self.mpk_dir.iterdir())
+            if has_correct_suffix(path, ".mpk")
+        ]
+        updated = 0
+        for path in archives:
+            if stamps.get(path.name) != file_stamp(path):
+                self.index_archive(path)
+                updated += 1
+        with self.db:
+            for name in stamps.keys() - {path.name for path in archives}:
+                self.db.execute("DELETE FROM archives WHERE name = ?", (name,))
+                self.db.execute("DELETE FROM files WHERE archive = ?", (name,))
+        return updated
+
+    def index_archive(self, path: Path):
+        stamp = file_stamp(path)
+        with MPK(path) as mpk:
+            toc = mpk.entries
+            rows = [
+                (path.name, idx, Path(filepath).as_posix(), *fields)
+                for idx, (filepath, *fields) in enumerate(
+                    zip(
+                        toc.filepaths,
+                        toc.compress_flags,
+                        toc.data_offsets,
+                        toc.compressed_data_sizes,
+                        toc.uncompressed_data_sizes,
+                    )
+                )
+                if filepath != ""
+            ]
+        with self.db:
+            self.db.execute("DELETE FROM files WHERE archive = ?", (path.name,))
+            self.db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.execute(
+                "INSERT OR REPLACE INTO archives VALUES (?, ?, ?)",
+                (path.name, *stamp),
+            )
+
+    def find(self, filepath: str) -> tuple[Path, int]:
+        # filepath can be prefixed by the archive name, like in the export folders
+        filepath = Path(filepath).as_posix()
+        archive, _, sub_path = filepath.partition("/")
+        matches = self.db.execute(
+            "SELECT archive, toc_idx FROM files WHERE archive = ? AND filepath = ?",
+            (archive, sub_path),
+        ).fetchall()
+        if len(matches) == 0:
+            matches = self.db.execute(
+                "SELECT archive, toc_idx FROM files WHERE filepath = ?", (filepath,)
+            ).fetchall()
+        if len(matches) == 0:
+            raise Exception(f"Error: {filepath} isn't in any archive of {self.mpk_dir}")
+        if len(matches) > 1:
+            archives = ", ".join(archive for archive, _ in matches)
+            raise Exception(
+                f"Error: {filepath} is in several archives ({archives}), prefix it with the archive name"
+            )
+        archive, toc_idx = matches[0]
+        return self.mpk_dir / archive, toc_idx
+
+    def read_file(self, filepath: str) -> bytes:
+        archive, toc_idx = self.find(filepath)
+        with EndianBinaryMappedReader(archive) as f:
+            f.seek(0x40 + 0x100 * toc_idx)
+            return MPKEntry(f).read_file()
+
+    def extract_file(self, filepath: str, out_path: str):
+        Path(out_path).parent.mkdir(exist_ok=True, parents=True)
+        Path(out_path).write_bytes(self.read_file(filepath))
+
+    def replace_file(self, filepath: str, new_filepath: str, level: int = -1):
+        archive, toc_idx = self.find(filepath)
+        with MPK(archive) as mpk:
+            mpk.entries[toc_idx].import_file(new_filepath, level)
+            mpk.update()
+        self.index_archive(archive)
+
+
+def extract_entry(entry: MPKEntry, extract_path: Path) -> str:
+    extract_path.parent.mkdir(exist_ok=True, parents=True)
+    return entry.write_file(extract_path)
+
+
+def extract_entries(tasks: list, jobs: int = 1, manifest: Manifest | None = None):
+    # decompression and writes run in threads, zlib and file I/O release the GIL
+    failed = 0
+    for (entry, extract_path), digest, error in run_jobs(extract_entry, tasks, jobs):
+        if error is None:
+            print(f"Extracted {entry.filepath} from {entry.file.filepath}")
+            if manifest is not None:
+                records = manifest.data[Path(entry.file.filepath).name]["files"]
+                records[Path(entry.filepath).as_posix()] = {
+                    "hash": digest,
+                    "stamp": file_stamp(extract_path),
+                }
+        else:
+            print(
+                f"Error while extracting {entry.filepath} from {entry.file.filepath}: {error}"
+            )
+            failed += 1
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be extracted")
+
+
+def batch_export_mpk(
+    input_dir: str,
+    extracted_dir: str,
+    jobs: int = 1,
+    include: list = [],
+    exclude: list = [],
+):
+    accept = path_filter(include, exclude)
+    manifest = Manifest(Path(extracted_dir, MANIFEST_NAME))
+    with ExitStack() as stack:
+        tasks = []
+        for path in sorted(Path(input_dir).iterdir()):
+            if has_correct_suffix(path, ".mpk"):
+                mpk = stack.enter_context(MPK(path))
+                tasks += mpk.get_extract_tasks(Path(extracted_dir, path.name), accept)
+                record = manifest.data.get(path.name)
+                if record is None or record["stamp"] != file_stamp(path):
+                    manifest.data[path.name] = {"stamp": file_stamp(path), "files": {}}
+        try:
+            extract_entries(tasks, jobs, manifest)
+        finally:
+            manifest.save()
+
+
+def import_entry(entry: MPKEntry, lookup_path: Path, level: int) -> str:
+    return entry.import_file(lookup_path, level)
+
+
+def has_changed_files(dir: Path, records: dict) -> bool:
+    return any(
+        not is_unchanged(records.get(path.relative_to(dir).as_posix()), path)
+        for path in dir.rglob("*")
+        if path.is_file()
+    )
 
 
-def batch_import_mpk(input_dir: str, extracted_dir: str):
+def batch_import_mpk(
+    input_dir: str,
+    extracted_dir: str,
+    jobs: int = 1,
+    level: int = -1,
+    in_place: bool = False,
+):
+    manifest = Manifest(Path(extracted_dir, MANIFEST_NAME))
     for path in Path(input_dir).iterdir():
         if has_correct_suffix(path, ".mpk"):
-            mpk = MPK(path)
-            mpk.import_files(Path(extracted_dir, path.name))
-            mpk.save(path)
+            import_dir = Path(extracted_dir, path.name)
+            record = manifest.data.get(path.name)
+            if record is not None and record["stamp"] != file_stamp(path):
+                record = None  # the archive changed since it was extracted
+            if record is not None and not has_changed_files(
+                import_dir, record["files"]
+            ):
+                print(f"No changes for {path}, skipping...")
+                continue
+            records = None if record is None else record["files"]
+            with MPK(path) as mpk:
+                imported = mpk.import_files(import_dir, jobs, level, records)
+                if len(imported) != 0 and in_place:
+                    mpk.update()
+                elif len(imported) != 0:
+                    mpk.save(path)
+            if record is None:
+                record = {"files": {}}
+            for entry, lookup_path, digest in imported:
+                record["files"][Path(entry.filepath).as_posix()] = {
+                    "hash": digest,
+                    "stamp": file_stamp(lookup_path),
+                }
+            record["stamp"] = file_stamp(path)
+            manifest.data[path.name] = record
+            manifest.save()
+    manifest.save()
 
 
 def main():
     args = sys.argv
-    if args[1] == "-e":
-        batch_export_mpk(args[2], args[3])
-    elif args[1] == "-i":
-        batch_import_mpk(args[2], args[3])
+    jobs = int(pop_option(args, "-j", 1))
+    level = int(pop_option(args, "--level", -1))
+    in_place = pop_flag(args, "--in-place")
+    include = pop_options(args, "--include")
+    exclude = pop_options(args, "--exclude")
+    timings_path = pop_option(args, "--timings")
+    profile_path = pop_option(args, "--profile")
+    with instrumented(timings_path, profile_path):
+        if args[1] == "-e":
+            batch_export_mpk(args[2], args[3], jobs, include, exclude)
+        elif args[1] == "-i":
+            batch_import_mpk(args[2], args[3], jobs, level, in_place)
+        elif args[1] == "--index":
+            with MPKIndex(args[2]) as index:
+                print(f"Indexed {index.refresh()} archive(s).")
+        elif args[1] == "--extract":
+            with MPKIndex(args[2]) as index:
+                index.refresh()
+                index.extract_file(args[3], args[4])
+        elif args[1] == "--cat":
+            with MPKIndex(args[2]) as index:
+                index.refresh()
+                sys.stdout.buffer.write(index.read_file(args[3]))
+        elif args[1] == "--replace":
+            with MPKIndex(args[2]) as index:
+                index.refresh()
+                index.replace_file(args[3], args[4], level)
 
 
 if __name__ == "__main__":
@@ -1,17 +1,41 @@
 from utils import (
     EndianBinaryFileReader,
     EndianBinaryFileWriter,
-    EndianBinaryStreamWriter,
-    TextStreamReader,
-    load_font_txt,
+    Manifest,
+    PROJECT_NAME,
+    Profile,
+    ProjectStore,
+    TABLE_FORMATS,
+    TranslationMemory,
+    load_profile,
+    file_stamp,
+    get_profile_digest,
     has_correct_suffix,
+    hash_bytes,
+    hash_file,
+    instrumented,
+    is_unchanged,
+    pop_flag,
+    pop_option,
+    read_table,
+    run_jobs,
+    timings,
+    write_table,
 )
-import sys
 import json
+import sys
 from pathlib import Path
-import pandas as pd
 
 MAGIC = b"MES\x00"
+MANIFEST_NAME = "text_manifest.json"
+COLUMNS = [
+    "Type",
+    "Speaker Original",
+    "Speaker Translation",
+    "Original",
+    "Translation",
+    "Static code",
+]
 
 
 class MSB:
@@ -23,24 +47,24 @@ class MSB:
             self.unk = f.read_UInt32()
             self.entry_count = f.read_UInt32()
             self.data_start_offset = f.read_UInt32()
-            self.entries = [
-                MSBEntry(
-                    f,
-                    self.data_start_offset,
-                    self.settings,
-                    self.font,
-                    self.op_codes,
-                    self.buttons,
-                )
-                for _ in range(self.entry_count)
-            ]
+            pos = f.tell()
+            f.seek(0)
+            with timings.phase("read", items=1, file=self.filename) as record:
+                data = f.read()  # strings are decoded from memory
+                record["bytes"] = len(data)
+            f.seek(pos)
+            with timings.phase("decode", len(data), self.entry_count, self.filename):
+                self.entries = [
+                    MSBEntry(f, data, self.data_start_offset, self.profile)
+                    for _ in range(self.entry_count)
+                ]
             self.unk_ids = set()
             for entry in self.entries:
                 self.unk_ids |= entry.unknown_ids
 
-    def write_excel(self, out_dir: str):
-        out_path = Path(out_dir) / (self.filename + ".xlsx")
-        data = [
+    def write_excel(self, out_dir: str, fmt: str = "xlsx"):
+        out_path = Path(out_dir) / (self.filename + "." + fmt)
+        data = (
             [
                 entry.type,
                 entry.speaker,
@@ -50,61 +74,52 @@ class MSB:
                 entry.static_code,
             ]
             for entry in self.entries
-        ]
-        columns = [
-            "Type",
-            "Speaker Original",
-            "Speaker Translation",
-            "Original",
-            "Translation",
-            "Static code",
-        ]
-        df = pd.DataFrame(data=data, columns=columns)
-        df.to_excel(out_path)
+        )
+        with timings.phase(
+            "table_write", items=len(self.entries), file=self.filename
+        ) as record:
+            write_table(out_path, COLUMNS, data)
+            record["bytes"] = out_path.stat().st_size
 
     def load_excel(self, excel_file: str):
-        df = pd.read_excel(excel_file, index_col=0, dtype=str, na_filter=False)
-        for idx, data in enumerate(df["Translation"]):
-            self.entries[idx].string = str(data)
-        for idx, speaker in enumerate(df["Speaker Translation"]):
-            self.entries[idx].speaker = str(speaker)
-        for idx, data in enumerate(df["Static code"]):
-            self.entries[idx].static_code = str(data)
+        with timings.phase("table_read", file=self.filename) as record:
+            table = read_table(excel_file)
+            record["bytes"] = Path(excel_file).stat().st_size
+            record["items"] = len(table["Translation"])
+        for idx, data in enumerate(table["Translation"]):
+            self.entries[idx].string = data
+        for idx, speaker in enumerate(table["Speaker Translation"]):
+            self.entries[idx].speaker = speaker
+        for idx, data in enumerate(table["Static code"]):
+            self.entries[idx].static_code = data
 
     def load_profile(self, game_code: str):
-        profile_path = Path("profiles") / game_code
-        assert (
-            profile_path.is_dir()
-        ), f"Error: No profile found for this game code: {game_code}"
-        self.font = load_font_txt(game_code)
-        buttons = json.load(
-            open(profile_path / "buttons.json", mode="r", encoding="utf-8")
-        )
-        self.buttons = {int(k): v for k, v in buttons.items()}
-        op_codes = json.load(
-            open(profile_path / "op_codes.json", mode="r", encoding="utf-8")
-        )
-        self.op_codes = {int(k): v for k, v in op_codes.items()}
-        self.settings = json.load(
-            open(profile_path / "settings.json", mode="r", encoding="utf-8")
-        )
+        self.profile = load_profile(game_code)
 
     def save(self, out_filepath: str):
-        with EndianBinaryFileWriter(out_filepath) as f:
-            f.write(MAGIC)
-            f.write_UInt32(self.unk)
-            f.write_UInt32(self.entry_count)
-            f.write_UInt32(self.data_start_offset)
+        with timings.phase(
+            "encode", items=self.entry_count, file=self.filename
+        ) as record:
+            offsets = []
             entries_data = bytearray()
             for entry in self.entries:
-                entry_offset = len(entries_data)
-                f.write_UInt32(entry.unk)
-                if entry.is_invalid:
-                    f.write_UInt32(0xFF_FF_FF_FF)
-                else:
-                    f.write_UInt32(entry_offset)
-                entries_data += entry.to_bytes()
-            f.write(entries_data)
+                offsets.append(len(entries_data))
+                entry.write_bytes(entries_data)
+            record["bytes"] = len(entries_data)
+        with timings.phase("write", items=1, file=self.filename) as record:
+            with EndianBinaryFileWriter(out_filepath) as f:
+                f.write(MAGIC)
+                f.write_UInt32(self.unk)
+                f.write_UInt32(self.entry_count)
+                f.write_UInt32(self.data_start_offset)
+                for entry, entry_offset in zip(self.entries, offsets):
+                    f.write_UInt32(entry.unk)
+                    if entry.is_invalid:
+                        f.write_UInt32(0xFF_FF_FF_FF)
+                    else:
+                        f.write_UInt32(entry_offset)
+                f.write(entries_data)
+                record["bytes"] = f.tell()
 
     def get_speakers(self):
         speakers = set()
@@ -122,22 +137,16 @@ class MSB:
 class MSBEntry:
     type: str = "static"
     is_invalid: bool = False
+    raw: bytes | None = None
 
     def __init__(
         self,
         f: EndianBinaryFileReader,
+        data: bytes,
         data_start_offset: int,
-        settings: dict,
-        font: str,
-        op_codes: dict,
-        buttons: dict,
+        profile: Profile,
     ):
-        self.settings, self.font, self.op_codes, self.buttons = (
-            settings,
-            font,
-            op_codes,
-            buttons,
-        )
+        self.profile = profile
         self.data_start_offset = data_start_offset
         self.unk = f.read_UInt32()  # ?
         self.data_offset = f.read_UInt32()
@@ -147,228 +156,503 @@ class MSBEntry:
         self.unknown_ids = set()
 
         if self.data_offset != 0xFF_FF_FF_FF:
-            f.set_endianness("big")
-            pos = f.tell()
-            f.seek(self.data_start_offset + self.data_offset)
-            self.read_data(f)
-            f.seek(pos)
-            f.set_endianness("little")
+            self.read_data(data, self.data_start_offset + self.data_offset)
 
         else:
             self.is_invalid = True
 
-    def read_data(self, f: EndianBinaryFileReader):
-        val = f.read_UInt8()
+    def read_data(self, data: bytes, pos: int):
+        start = pos
+        val = data[pos]
+        pos += 1
         while True:
             match val:
                 case 0x01:  # speaker name if it's a dialogue entry
                     self.type = "dialogue"
-                    self.speaker, val = self.decode_string(f)
+                    self.speaker, val, pos = self.decode_string(data, pos)
 
                 case 0x02:  # text if it's a dialogue entry
                     if (
                         self.string != ""
                     ):  # very rarely, there is a code before the speaker
                         self.static_code = self.string
-                    self.string, val = self.decode_string(f)
+                    self.string, val, pos = self.decode_string(data, pos)
 
                 case 0xFF:  # end of section
                     break
 
                 case _:  # entry with text only (UI text)
-                    f.seek(-1, 1)
-                    self.string, val = self.decode_string(f)
-
-    def decode_string(self, f: EndianBinaryFileReader) -> str:
-        color_flag = False
-        out_string = ""
-        val = f.read_UInt8()
-        while True:
-
-            if val in [1, 2, 0xFF]:
-                break
-
-            elif val >= 0x80:
-                f.seek(-1, 1)
-                if self.settings["bytes_per_char"] == 2:
-                    idx = f.read_UInt16() - 0x8000  # 16 bits per char
-                elif self.settings["bytes_per_char"] == 4:
-                    idx = f.read_UInt32() - 0x80_00_00_00  # 32 bits per chat
-
-                if self.font[idx] == chr(0x3000) and idx in self.buttons:
-                    out_string += f"<{self.buttons[idx]}>"
-                else:
-                    assert idx < len(
-                        self.font
-                    ), f"Char number {idx} is beyond font table length"
-                    char = self.font[idx]
-                    out_string += char
-                    if char == " " and idx != 63:
-                        self.unknown_ids.add(idx)
-
-            elif val == 0:
-                out_string += "\n"
-
-            elif val in self.op_codes:
-                name, arg_count = self.op_codes[val]
-
-                if (
-                    val == 4 and self.settings["asymetrical_color_code"]
-                ):  # in Famicom Detective Club, text color op codes have 4 arguments then 3 (annoying)
-                    if color_flag:
-                        color_flag = False
-                    else:
-                        arg_count = 4
-                        color_flag = True
-
-                if arg_count == 0:
-                    out_string += f"<{name}>"
-                else:
-                    args = [str(f.read_UInt8()) for _ in range(arg_count)]
-                    out_string += f"<{name}:{','.join(args)}>"
+                    self.string, val, pos = self.decode_string(data, pos - 1)
 
-            else:
-                raise Exception(
-                    f"Unknown code value {val} at offset {hex(f.tell() - 1)}"
-                )
+        # untouched entries are written back as they were read
+        self.raw = data[start:pos]
+        self.original = (self.static_code, self.speaker, self.string)
 
-            val = f.read_UInt8()
-        return out_string, val
+    def decode_string(self, data: bytes, pos: int) -> tuple[str, int, int]:
+        return self.profile.codec.decode(data, pos, self.unknown_ids)
 
     def encode_string(self, string: str) -> bytes:
-        reverse_op_codes = {v[0]: k for k, v in self.op_codes.items()}
-        reverse_buttons = {v: k for k, v in self.buttons.items()}
-        out_stream = EndianBinaryStreamWriter(endianness="big")
-        stream = TextStreamReader(string)
-        char = stream.read(1)
-
-        while char != "":
-            if char == "<":
-                code = stream.readUntilOccurrence(">")
-                name = code.split(":")[0]
-
-                if name in reverse_op_codes:
-                    out_stream.write_UInt8(reverse_op_codes[name])
-                elif name in reverse_buttons:
-                    if self.settings["bytes_per_char"] == 2:
-                        out_stream.write_UInt16(0x8000 + reverse_buttons[name])
-                    elif self.settings["bytes_per_char"] == 4:
-                        out_stream.write_UInt32(0x80_00_00_00 + reverse_buttons[name])
-                else:
-                    raise Exception(f"Unknown tag {code}")
-
-                if ":" in code:
-                    args = code.split(":")[1].split(",")
-                    for arg in args:
-                        out_stream.write_UInt8(int(arg))
-            else:
-                if char == "\n":
-                    out_stream.write_UInt8(0)
-                elif char == "\r":
-                    pass
-                elif char not in self.font:
-                    print(
-                        f"WARNING: The character {char} isn't in the font.txt file, it must be added. It has been ignored."
-                    )
-                else:
-                    val = self.font.index(char)
-                    if self.settings["bytes_per_char"] == 2:
-                        out_stream.write_UInt16(0x8000 + val)
-                    elif self.settings["bytes_per_char"] == 4:
-                        out_stream.write_UInt32(0x80_00_00_00 + val)
-
-            char = stream.read(1)
-        return out_stream.getvalue()
-
-    def to_bytes(self) -> bytes:
+        out = bytearray()
+        self.profile.codec.encode(string, out)
+        return bytes(out)
 
+    def write_bytes(self, out: bytearray):
+        # appends the encoded entry to out
         if self.is_invalid:
-            return bytes()
+            return
 
-        stream = EndianBinaryStreamWriter()
-        stream.write(self.encode_string(self.static_code))
+        if self.raw is not None and self.is_unchanged():
+            out += self.raw
+            return
+
+        self.profile.codec.encode(self.static_code, out)
 
         if self.type == "dialogue":
-            stream.write_UInt8(1)
-            stream.write(self.encode_string(self.speaker))
-            stream.write_UInt8(2)
-            stream.write(self.encode_string(self.string))
+            out.append(1)
+            self.profile.codec.encode(self.speaker, out)
+            out.append(2)
+            self.profile.codec.encode(self.string, out)
 
         else:
-            stream.write(self.encode_string(self.string))
+            self.profile.codec.encode(self.string, out)
+
+        out.append(0xFF)
 
-        stream.write_UInt8(0xFF)
+    def is_unchanged(self) -> bool:
+        return (self.static_code, self.speaker, self.string) == self.original
 
-        return stream.getvalue()
+    def to_bytes(self) -> bytes:
+        out = bytearray()
+        self.write_bytes(out)
+        return bytes(out)
 
 
 def write_speakers(filepath: str, speakers: list):
-    data = [[speakers[idx], speakers[idx]] for idx in range(len(speakers))]
-    df = pd.DataFrame(data=data, columns=["Original", "Translation"])
-    df.to_excel(filepath)
+    data = ([speaker, speaker] for speaker in speakers)
+    write_table(filepath, ["Original", "Translation"], data)
 
 
 def load_speakers(filepath: str):
-    speakers = {}
-    df = pd.read_excel(filepath)
-    for idx in range(len(df["Original"])):
-        speakers[df["Original"][idx]] = df["Translation"][idx]
-    return speakers
-
-
-def convert_speakers(xlsx_dir: str, speakers_path: str):
+    table = read_table(filepath)
+    return dict(zip(table["Original"], table["Translation"]))
+
+
+def convert_speakers_file(path: Path, speaker_trad_map: dict) -> bool:
+    # returns True if the file was rewritten
+    table = read_table(path)
+    if "Speaker Original" not in table:
+        return False
+    translations = table["Speaker Translation"]
+    new_translations = [
+        speaker_trad_map.get(speaker, translation)
+        for speaker, translation in zip(table["Speaker Original"], translations)
+    ]
+    if new_translations == translations:
+        return False
+    table["Speaker Translation"] = new_translations
+    write_table(path, list(table.keys()), zip(*table.values()))
+    return True
+
+
+def convert_speakers(xlsx_dir: str, speakers_path: str, jobs: int = 1):
+    # the sheets are expected in the same format as the speakers file, only
+    # the sheets with a new speaker translation are written
     print("Converting speakers...")
+    if Path(speakers_path).suffix == ".db":
+        with ProjectStore(speakers_path) as store:
+            print(f"Updated {store.convert_speakers()} entries.")
+        print("Done!")
+        return
     speaker_trad_map = load_speakers(speakers_path)
-    for path in Path(xlsx_dir).iterdir():
-        if has_correct_suffix(path, ".xlsx"):
-            df = pd.read_excel(path, index_col=0, dtype=str, na_filter=False)
-            if "Speaker Original" in df.columns:
-                for idx, speaker in enumerate(df["Speaker Original"]):
-                    if speaker in speaker_trad_map:
-                        df["Speaker Translation"][idx] = speaker_trad_map[speaker]
-                df.to_excel(path)
+    suffix = Path(speakers_path).suffix
+    tasks = [
+        (path, speaker_trad_map)
+        for path in sorted(Path(xlsx_dir).iterdir())
+        if has_correct_suffix(path, suffix) and path != Path(speakers_path)
+    ]
+    updated = 0
+    failed = 0
+    for task, changed, error in run_jobs(convert_speakers_file, tasks, jobs, True):
+        if error is not None:
+            print(f"Error while converting speakers of {task[0]}: {error}")
+            failed += 1
+        elif changed:
+            updated += 1
+    print(f"Updated {updated} of {len(tasks)} file(s).")
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be converted")
     print("Done!")
 
 
-def batch_export(game_code: str, input_dir: str, extraction_dir: str):
-    speakers = set()
-    # unk_ids = set()
+def export_text(
+    text_class, game_code: str, path: Path, extraction_dir: str, fmt: str = "xlsx"
+) -> set:
+    text = text_class(path, game_code)
+    text.write_excel(extraction_dir, fmt)
+    return text.get_speakers()
+
+
+def import_text(text_class, game_code: str, path: Path, excel_path: Path) -> dict:
+    # returns the manifest record of the sheet and of the new binary
+    text = text_class(path, game_code)
+    text.load_excel(excel_path)
+    text.save(path)
+    return {
+        "sheet": {"hash": hash_file(excel_path), "stamp": file_stamp(excel_path)},
+        "binary": {"hash": hash_file(path), "stamp": file_stamp(path)},
+    }
+
+
+def batch_export_text(
+    text_class,
+    suffix: str,
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt: str = "xlsx",
+):
+    # shared by msb and scx files, files are processed by a pool of jobs processes
     Path(extraction_dir).mkdir(exist_ok=True, parents=True)
-    for path in Path(input_dir).iterdir():
-        if has_correct_suffix(path, ".msb"):
-            print(f"Exporting {path}...")
-            msb = MSB(path, game_code)
-            speakers |= msb.get_speakers()
-            msb.write_excel(extraction_dir)
-            # unk_ids |= msb.unk_ids
+    tasks = [
+        (text_class, game_code, path, extraction_dir, fmt)
+        for path in sorted(Path(input_dir).iterdir())
+        if has_correct_suffix(path, suffix)
+    ]
+    speakers = set()
+    failed = 0
+    for task, file_speakers, error in run_jobs(export_text, tasks, jobs, True):
+        if error is None:
+            print(f"Exported {task[2]}")
+            speakers |= file_speakers
+        else:
+            print(f"Error while exporting {task[2]}: {error}")
+            failed += 1
+
+    print("Writing speakers file...")
+    write_speakers(Path(extraction_dir) / ("speakers." + fmt), sorted(speakers))
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be exported")
+    print("Done!")
+
+
+def batch_import_text(
+    text_class,
+    suffix: str,
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt: str = "xlsx",
+):
+    # files are skipped when their sheet, the binary written by the last
+    # import and the game profile are all unchanged
+    manifest = Manifest(Path(extraction_dir, MANIFEST_NAME))
+    profile_digest = get_profile_digest(game_code)
+    tasks = []
+    for path in sorted(Path(input_dir).iterdir()):
+        if has_correct_suffix(path, suffix):
+            excel_path = Path(extraction_dir, path.name + "." + fmt)
+            record = manifest.data.get(path.name)
+            # a missing sheet is reported by import_text like any other error
+            if (
+                record is not None
+                and record["profile"] == profile_digest
+                and excel_path.is_file()
+                and is_unchanged(record.get("sheet"), excel_path)
+                and is_unchanged(record["binary"], path)
+            ):
+                print(f"No changes for {path}, skipping...")
+                continue
+            tasks.append((text_class, game_code, path, excel_path))
+    failed = 0
+    try:
+        for task, record, error in run_jobs(import_text, tasks, jobs, True):
+            if error is None:
+                print(f"Imported text to {task[2]}")
+                manifest.data[task[2].name] = {"profile": profile_digest, **record}
+            else:
+                print(f"Error while importing text to {task[2]}: {error}")
+                manifest.data.pop(task[2].name, None)
+                failed += 1
+    finally:
+        manifest.save()
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be imported")
+    print("Done!")
+
+
+def read_text(text_class, game_code: str, path: Path) -> list:
+    text = text_class(path, game_code)
+    return [(entry.string, entry.speaker) for entry in text.entries]
 
+
+def batch_export_memory(
+    text_class,
+    suffix: str,
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt: str = "xlsx",
+):
+    # writes every unique string once in a strings file instead of one sheet
+    # per file, the entries of each string are kept in strings_index.json
+    Path(extraction_dir).mkdir(exist_ok=True, parents=True)
+    tasks = [
+        (text_class, game_code, path)
+        for path in sorted(Path(input_dir).iterdir())
+        if has_correct_suffix(path, suffix)
+    ]
+    memory = TranslationMemory()
+    failed = 0
+    for task, entries, error in run_jobs(read_text, tasks, jobs, True):
+        if error is None:
+            print(f"Exported {task[2]}")
+            memory.add_file(task[2].name, entries)
+        else:
+            print(f"Error while exporting {task[2]}: {error}")
+            failed += 1
+
+    entry_count = sum(len(speakers) for speakers in memory.speakers.values())
+    print(f"Writing {len(memory.strings)} unique strings from {entry_count} entries...")
+    memory.save(extraction_dir, fmt)
+    speakers = {
+        speaker
+        for file_speakers in memory.speakers.values()
+        for speaker in file_speakers
+        if speaker != ""
+    }
     print("Writing speakers file...")
-    write_speakers(Path(extraction_dir) / "speakers.xlsx", list(speakers))
-    #  with open('unk.txt', mode='w') as f:
-    #     for id in unk_ids: f.write(str(id) + '\n')
+    write_speakers(Path(extraction_dir) / ("speakers." + fmt), sorted(speakers))
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be exported")
+    print("Done!")
+
+
+def import_memory_text(
+    text_class, game_code: str, path: Path, strings: list, speakers: list
+) -> dict:
+    text = text_class(path, game_code)
+    assert len(text.entries) == len(
+        strings
+    ), f"Error: {path} does not have the entry count of the exported file"
+    for entry, string, speaker in zip(text.entries, strings, speakers):
+        if string is not None:
+            entry.string = string
+        entry.speaker = speaker
+    text.save(path)
+    return {"binary": {"hash": hash_file(path), "stamp": file_stamp(path)}}
+
+
+def batch_import_memory(
+    text_class,
+    suffix: str,
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt: str = "xlsx",
+):
+    # writes the translation of each string of the strings file to all of its
+    # entries, and the translation of the original speaker of each entry
+    memory = TranslationMemory.load(extraction_dir, fmt)
+    speaker_trad_map = load_speakers(Path(extraction_dir) / ("speakers." + fmt))
+    file_strings = memory.get_file_strings()
+    manifest = Manifest(Path(extraction_dir, MANIFEST_NAME))
+    profile_digest = get_profile_digest(game_code)
+    tasks = []
+    digests = {}
+    for path in sorted(Path(input_dir).iterdir()):
+        if has_correct_suffix(path, suffix):
+            if path.name not in memory.speakers:
+                print(f"No strings for {path}, skipping...")
+                continue
+            strings = file_strings[path.name]
+            speakers = [
+                speaker_trad_map.get(speaker, speaker)
+                for speaker in memory.speakers[path.name]
+            ]
+            digest = hash_bytes(json.dumps([strings, speakers]).encode("utf-8"))
+            record = manifest.data.get(path.name)
+            if (
+                record is not None
+                and record["profile"] == profile_digest
+                and record.get("strings") == digest
+                and is_unchanged(record["binary"], path)
+            ):
+                print(f"No changes for {path}, skipping...")
+                continue
+            tasks.append((text_class, game_code, path, strings, speakers))
+            digests[path.name] = digest
+    failed = 0
+    try:
+        for task, record, error in run_jobs(import_memory_text, tasks, jobs, True):
+            name = task[2].name
+            if error is None:
+                print(f"Imported text to {task[2]}")
+                manifest.data[name] = {
+                    "profile": profile_digest,
+                    "strings": digests[name],
+                    **record,
+                }
+            else:
+                print(f"Error while importing text to {task[2]}: {error}")
+                manifest.data.pop(name, None)
+                failed += 1
+    finally:
+        manifest.save()
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be imported")
     print("Done!")
 
 
-def batch_import(game_code: str, input_dir: str, extraction_dir: str):
-    for path in Path(input_dir).iterdir():
-        if has_correct_suffix(path, ".msb"):
-            msb = MSB(path, game_code)
-            print(f"Importing text to {path}...")
-            msb.load_excel(Path(extraction_dir, path.name + "xlsx"))
-            msb.save(path)
+def read_rows(text_class, game_code: str, path: Path) -> list:
+    text = text_class(path, game_code)
+    return [
+        (entry.type, entry.speaker, entry.string, entry.static_code)
+        for entry in text.entries
+    ]
+
+
+def batch_export_project(
+    text_class,
+    suffix: str,
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+):
+    # writes the text of all the files to a single project.db, see ProjectStore
+    Path(extraction_dir).mkdir(exist_ok=True, parents=True)
+    tasks = [
+        (text_class, game_code, path)
+        for path in sorted(Path(input_dir).iterdir())
+        if has_correct_suffix(path, suffix)
+    ]
+    speakers = set()
+    failed = 0
+    with ProjectStore(Path(extraction_dir, PROJECT_NAME)) as store:
+        for task, rows, error in run_jobs(read_rows, tasks, jobs, True):
+            if error is None:
+                print(f"Exported {task[2]}")
+                store.write_file(task[2].name, rows)
+                speakers |= {speaker for _, speaker, _, _ in rows if speaker != ""}
+            else:
+                print(f"Error while exporting {task[2]}: {error}")
+                failed += 1
+        store.write_speakers(sorted(speakers))
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be exported")
+    print("Done!")
+
+
+def import_project_text(text_class, game_code: str, path: Path, rows: list) -> dict:
+    text = text_class(path, game_code)
+    for idx, speaker, string, static_code in rows:
+        entry = text.entries[idx]
+        entry.speaker = speaker
+        entry.string = string
+        entry.static_code = static_code
+    text.save(path)
+    return {"hash": hash_file(path), "stamp": file_stamp(path)}
+
+
+def batch_import_project(
+    text_class,
+    suffix: str,
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+):
+    # only the entries modified since the last import are written, unless the
+    # binary or the profile changed since then
+    profile_digest = get_profile_digest(game_code)
+    with ProjectStore(Path(extraction_dir, PROJECT_NAME)) as store:
+        files = store.get_files()
+        tasks = []
+        for path in sorted(Path(input_dir).iterdir()):
+            if has_correct_suffix(path, suffix):
+                if path.name not in files:
+                    print(f"No entries for {path}, skipping...")
+                    continue
+                profile, record = files[path.name]
+                partial = profile == profile_digest and is_unchanged(record, path)
+                rows = store.get_rows(path.name, partial)
+                if partial and len(rows) == 0:
+                    print(f"No changes for {path}, skipping...")
+                    continue
+                tasks.append((text_class, game_code, path, rows))
+        failed = 0
+        for task, record, error in run_jobs(import_project_text, tasks, jobs, True):
+            if error is None:
+                print(f"Imported {len(task[3])} entries to {task[2]}")
+                store.set_imported(task[2].name, profile_digest, record)
+            else:
+                print(f"Error while importing text to {task[2]}: {error}")
+                failed += 1
+    if failed != 0:
+        raise Exception(f"Error: {failed} file(s) could not be imported")
     print("Done!")
 
 
+def batch_export(
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt="xlsx",
+    unique: bool = False,
+):
+    if fmt == "db":
+        batch_export_project(MSB, ".msb", game_code, input_dir, extraction_dir, jobs)
+        return
+    export = batch_export_memory if unique else batch_export_text
+    export(MSB, ".msb", game_code, input_dir, extraction_dir, jobs, fmt)
+
+
+def batch_import(
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt="xlsx",
+    unique: bool = False,
+):
+    if fmt == "db":
+        batch_import_project(MSB, ".msb", game_code, input_dir, extraction_dir, jobs)
+        return
+    import_ = batch_import_memory if unique else batch_import_text
+    import_(MSB, ".msb", game_code, input_dir, extraction_dir, jobs, fmt)
+
+
+def get_format(args: list) -> str:
+    # db is the project database, the other formats write one file per script
+    fmt = pop_option(args, "--format", "xlsx")
+    if fmt not in TABLE_FORMATS + ["db"]:
+        raise Exception(
+            f"Error: unknown format {fmt}, expected one of {TABLE_FORMATS + ['db']}"
+        )
+    return fmt
+
+
 def main():
     args = sys.argv
-    if args[1] == "-e":
-        batch_export(args[2], args[3], args[4])
-    elif args[1] == "-i":
-        batch_import(args[2], args[3], args[4])
-    elif args[1] == "-s":
-        convert_speakers(args[2], args[3])
-    else:
+    jobs = int(pop_option(args, "-j", 1))
+    fmt = get_format(args)
+    unique = pop_flag(args, "--unique")
+    timings_path = pop_option(args, "--timings")
+    profile_path = pop_option(args, "--profile")
+    if args[1] not in ["-e", "-i", "-s"]:
         return
+    with instrumented(timings_path, profile_path):
+        if args[1] == "-e":
+            batch_export(args[2], args[3], args[4], jobs, fmt, unique)
+        elif args[1] == "-i":
+            batch_import(args[2], args[3], args[4], jobs, fmt, unique)
+        elif args[1] == "-s":
+            convert_speakers(args[2], args[3], jobs)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,26 @@
-from utils import EndianBinaryFileReader, EndianBinaryFileWriter, has_correct_suffix
+from utils import (
+    EndianBinaryFileReader,
+    EndianBinaryFileWriter,
+    Profile,
+    instrumented,
+    pop_flag,
+    pop_option,
+    timings,
+)
 import sys
 from pathlib import Path
-from msb import MSB, MSBEntry, write_speakers, convert_speakers
+from msb import (
+    MSB,
+    MSBEntry,
+    batch_export_memory,
+    batch_export_project,
+    batch_export_text,
+    batch_import_memory,
+    batch_import_project,
+    batch_import_text,
+    convert_speakers,
+    get_format,
+)
 
 MAGIC = b"SC3\x00"
 
@@ -18,10 +37,19 @@ class SCX(MSB):  # inherit MSB methods
                 self.unk_table_offset - self.text_table_offset
             ) // 4
             self.script_data = f.read(self.text_table_offset - 12)
-            self.entries = [
-                SCXTextEntry(f, self.settings, self.font, self.op_codes, self.buttons)
-                for _ in range(self.text_entry_count)
-            ]
+            pos = f.tell()
+            f.seek(0)
+            with timings.phase("read", items=1, file=self.filename) as record:
+                data = f.read()  # strings are decoded from memory
+                record["bytes"] = len(data)
+            f.seek(pos)
+            with timings.phase(
+                "decode", len(data), self.text_entry_count, self.filename
+            ):
+                self.entries = [
+                    SCXTextEntry(f, data, self.profile)
+                    for _ in range(self.text_entry_count)
+                ]
             f.seek(self.unk_table_offset)
             if len(self.entries) > 0:
                 self.unk_table_data = f.read(
@@ -32,98 +60,101 @@ class SCX(MSB):  # inherit MSB methods
                 self.unk_table_data = f.read()
 
     def save(self, out_filepath: str):
-        with EndianBinaryFileWriter(out_filepath) as f:
-            f.write(MAGIC)
-            f.write_UInt32(self.text_table_offset)
-            f.write_UInt32(self.unk_table_offset)
-            f.write(self.script_data)
+        with timings.phase(
+            "encode", items=self.text_entry_count, file=self.filename
+        ) as record:
+            offsets = []
             entries_data = bytearray()
             for entry in self.entries:
-                entry_offset = (
+                offsets.append(
                     self.text_table_offset
                     + 4 * self.text_entry_count
                     + len(self.unk_table_data)
                     + len(entries_data)
                 )
-                if entry.is_invalid:
-                    f.write_UInt32(0xFF_FF_FF_FF)
-                else:
-                    f.write_UInt32(entry_offset)
-                entries_data += entry.to_bytes()
-            f.write(self.unk_table_data)
-            f.write(entries_data)
+                entry.write_bytes(entries_data)
+            record["bytes"] = len(entries_data)
+        with timings.phase("write", items=1, file=self.filename) as record:
+            with EndianBinaryFileWriter(out_filepath) as f:
+                f.write(MAGIC)
+                f.write_UInt32(self.text_table_offset)
+                f.write_UInt32(self.unk_table_offset)
+                f.write(self.script_data)
+                for entry, entry_offset in zip(self.entries, offsets):
+                    if entry.is_invalid:
+                        f.write_UInt32(0xFF_FF_FF_FF)
+                    else:
+                        f.write_UInt32(entry_offset)
+                f.write(self.unk_table_data)
+                f.write(entries_data)
+                record["bytes"] = f.tell()
 
 
 class SCXTextEntry(MSBEntry):  # inherit MSB methods related to data encoding
     type: str = "static"
 
-    def __init__(
-        self,
-        f: EndianBinaryFileReader,
-        settings: dict,
-        font: str,
-        op_codes: dict,
-        buttons: dict,
-    ):
-        self.settings, self.font, self.op_codes, self.buttons = (
-            settings,
-            font,
-            op_codes,
-            buttons,
-        )
+    def __init__(self, f: EndianBinaryFileReader, data: bytes, profile: Profile):
+        self.profile = profile
         self.data_offset = f.read_UInt32()
         self.is_invalid = False
         self.string = ""
         self.speaker = ""
         self.static_code = ""
+        self.unknown_ids = set()
 
         if self.data_offset == 0xFF_FF_FF_FF:
             self.is_invalid = True
 
         else:
-            f.set_endianness("big")
-            pos = f.tell()
-            f.seek(self.data_offset)
-            self.read_data(f)
-            f.seek(pos)
-            f.set_endianness("little")
-
-
-def batch_export(game_code: str, input_dir: str, extraction_dir: str):
-    speakers = set()
-    Path(extraction_dir).mkdir(exist_ok=True, parents=True)
-    for path in Path(input_dir).iterdir():
-        if has_correct_suffix(path, ".scx"):
-            print(f"Exporting {path}...")
-            scx = SCX(path, game_code)
-            speakers |= scx.get_speakers()
-            scx.write_excel(extraction_dir)
-
-    print("Writing speakers file...")
-    write_speakers(Path(extraction_dir) / "speakers.xlsx", list(speakers))
-    print("Done!")
-
-
-def batch_import(game_code: str, input_dir: str, extraction_dir: str):
-    for path in Path(input_dir).iterdir():
-        if has_correct_suffix(path, ".scx"):
-            scx = SCX(path, game_code)
-            print(f"Importing text to {path}...")
-            scx.load_excel(Path(extraction_dir, path.name + ".xlsx"))
-            scx.save(path)
-    print("Done!")
+            self.read_data(data, self.data_offset)
+
+
+def batch_export(
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt="xlsx",
+    unique: bool = False,
+):
+    if fmt == "db":
+        batch_export_project(SCX, ".scx", game_code, input_dir, extraction_dir, jobs)
+        return
+    export = batch_export_memory if unique else batch_export_text
+    export(SCX, ".scx", game_code, input_dir, extraction_dir, jobs, fmt)
+
+
+def batch_import(
+    game_code: str,
+    input_dir: str,
+    extraction_dir: str,
+    jobs: int = 1,
+    fmt="xlsx",
+    unique: bool = False,
+):
+    if fmt == "db":
+        batch_import_project(SCX, ".scx", game_code, input_dir, extraction_dir, jobs)
+        return
+    import_ = batch_import_memory if unique else batch_import_text
+    import_(SCX, ".scx", game_code, input_dir, extraction_dir, jobs, fmt)
 
 
 def main():
     args = sys.argv
-    if args[1] == "-e":
-        batch_export(args[2], args[3], args[4])
-    elif args[1] == "-i":
-        batch_import(args[2], args[3], args[4])
-    elif args[1] == "-s":
-        convert_speakers(args[2], args[3])
-    else:
+    jobs = int(pop_option(args, "-j", 1))
+    fmt = get_format(args)
+    unique = pop_flag(args, "--unique")
+    timings_path = pop_option(args, "--timings")
+    profile_path = pop_option(args, "--profile")
+    if args[1] not in ["-e", "-i", "-s"]:
         return
+    with instrumented(timings_path, profile_path):
+        if args[1] == "-e":
+            batch_export(args[2], args[3], args[4], jobs, fmt, unique)
+        elif args[1] == "-i":
+            batch_import(args[2], args[3], args[4], jobs, fmt, unique)
+        elif args[1] == "-s":
+            convert_speakers(args[2], args[3], jobs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+from utils import (
+    file_stamp,
+    get_profile_digest,
+    has_correct_suffix,
+    hash_file,
+    pop_option,
+    run_jobs,
+)
+from msb import MSB
+from scx import SCX
+from pathlib import Path
+import sqlite3
+import sys
+
+INDEX_NAME = "text_index.db"
+TEXT_CLASSES = {".msb": MSB, ".scx": SCX}
+
+
+def read_entries(text_class, game_code: str, path: Path) -> list:
+    text = text_class(path, game_code)
+    return [
+        (idx, entry.type, entry.speaker, entry.string, entry.static_code)
+        for idx, entry in enumerate(text.entries)
+        if not entry.is_invalid
+    ]
+
+
+class TextIndex:
+    # full text index of the decoded msb/scx files of a directory, files are
+    # reindexed when their hash changes, and everything when the profile changes
+    def __init__(self, text_dir: str, game_code: str):
+        self.text_dir = Path(text_dir)
+        self.game_code = game_code
+        self.db = sqlite3.connect(self.text_dir / INDEX_NAME)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS files"
+                "(name TEXT PRIMARY KEY, hash TEXT, size INTEGER, mtime INTEGER)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS settings(key TEXT PRIMARY KEY, value TEXT)"
+            )
+            # indexes built before the search was case sensitive are rebuilt
+            row = self.db.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'entries'"
+            ).fetchone()
+            if row is not None and "case_sensitive" not in row[0]:
+                self.db.execute("DROP TABLE entries")
+                self.db.execute("DELETE FROM files")
+            # the trigram tokenizer matches any substring of 3 chars or more,
+            # japanese text has no spaces to split words. It is case sensitive
+            # like the instr() fallback of shorter queries
+            self.db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5"
+                "(file UNINDEXED, idx UNINDEXED, type UNINDEXED, speaker, text,"
+                " static_code UNINDEXED, tokenize='trigram case_sensitive 1')"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def check_profile(self):
+        profile = f"{self.game_code}:{get_profile_digest(self.game_code)}"
+        row = self.db.execute(
+            "SELECT value FROM settings WHERE key = 'profile'"
+        ).fetchone()
+        if row is None or row[0] != profile:
+            with self.db:
+                self.db.execute("DELETE FROM files")
+                self.db.execute("DELETE FROM entries")
+                self.db.execute(
+                    "INSERT OR REPLACE INTO settings VALUES ('profile', ?)", (profile,)
+                )
+
+    def refresh(self, jobs: int = 1) -> int:
+        self.check_profile()
+        records = {
+            name: (hash, [size, mtime])
+            for name, hash, size, mtime in self.db.execute("SELECT * FROM files")
+        }
+        paths = [
+            path
+            for path in sorted(self.text_dir.iterdir())
+            if any(has_correct_suffix(path, suffix) for suffix in TEXT_CLASSES)
+        ]
+        tasks = []
+        hashes = {}
+        for path in paths:
+            record = records.get(path.name)
+            stamp = file_stamp(path)
+            if record is not None and record[1] == stamp:
+                continue
+            digest = hash_file(path)
+            if record is not None and record[0] == digest:
+                with self.db:
+                    self.db.execute(
+                        "UPDATE files SET size = ?, mtime = ? WHERE name = ?",
+                        (*stamp, path.name),
+                    )
+                continue
+            hashes[path.name] = digest
+            tasks.append((TEXT_CLASSES[path.suffix.lower()], self.game_code, path))
+
+        failed = 0
+        for task, entries, error in run_jobs(read_entries, tasks, jobs, True):
+            path = task[2]
+            if error is not None:
+                print(f"Error while indexing {path}: {error}")
+                failed += 1
+                continue
+            with self.db:
+                self.db.execute("DELETE FROM entries WHERE file = ?", (path.name,))
+                self.db.executemany(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                    [(path.name, *entry) for entry in entries],
+                )
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                    (path.name, hashes[path.name], *file_stamp(path)),
+                )
+        with self.db:
+            for name in records.keys() - {path.name for path in paths}:
+                self.db.execute("DELETE FROM files WHERE name = ?", (name,))
+                self.db.execute("DELETE FROM entries WHERE file = ?", (name,))
+        if failed != 0:
+            raise Exception(f"Error: {failed} file(s) could not be indexed")
+        return len(tasks)
+
+    def search(self, query: str, speaker: str | None = None, limit: int = 100):
+        # returns the (file, idx, type, speaker, text) of the entries whose text
+        # contains query
+        conditions = []
+        params = []
+        if len(query) >= 3:
+            conditions.append("text MATCH ?")
+            params.append('"' + query.replace('"', '""') + '"')
+        elif query != "":
+            conditions.append("instr(text, ?) > 0")
+            params.append(query)
+        if speaker is not None:
+            conditions.append("speaker = ?")
+            params.append(speaker)
+        where = " AND ".join(conditions) if len(conditions) != 0 else "1"
+        return self.db.execute(
+            "SELECT file, idx, type, speaker, text FROM entries"
+            f" WHERE {where} ORDER BY file, idx LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+
+
+def print_results(results: list):
+    for file, idx, _, speaker, text in results:
+        speaker = speaker.replace("\n", "\\n")
+        text = text.replace("\n", "\\n")
+        if speaker != "":
+            print(f"{file}:{idx} [{speaker}] {text}")
+        else:
+            print(f"{file}:{idx} {text}")
+
+
+def main():
+    args = sys.argv
+    jobs = int(pop_option(args, "-j", 1))
+    speaker = pop_option(args, "--speaker")
+    limit = int(pop_option(args, "--limit", 100))
+    if args[1] == "--index":
+        with TextIndex(args[3], args[2]) as index:
+            print(f"Indexed {index.refresh(jobs)} file(s).")
+    else:
+        with TextIndex(args[2], args[1]) as index:
+            index.refresh(jobs)
+            query = args[3] if len(args) > 3 else ""
+            print_results(index.search(query, speaker, limit))
+
+
+if __name__ == "__main__":
+    main()
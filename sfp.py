@@ -1,4 +1,11 @@
-from utils import EndianBinaryFileReader, EndianBinaryFileWriter, has_correct_suffix
+from utils import (
+    EndianBinaryFileReader,
+    EndianBinaryFileWriter,
+    has_correct_suffix,
+    instrumented,
+    pop_option,
+    timings,
+)
 from pathlib import Path
 import sys
 
@@ -17,11 +24,14 @@ class SFP:
     def __init__(self, filepath: str):
         self.filepath = Path(filepath)
         self.filename = self.filepath.name
-        with EndianBinaryFileReader(filepath) as f:
-            f.check_magic(MAGIC)
-            self.unk = f.read_UInt32()
-            self.entry_count = f.read_UInt32()
-            self.entries = [SFPEntry(f) for _ in range(self.entry_count)]
+        with timings.phase("read", items=1, file=self.filename) as record:
+            with EndianBinaryFileReader(filepath) as f:
+                f.check_magic(MAGIC)
+                self.unk = f.read_UInt32()
+                self.entry_count = f.read_UInt32()
+                self.entries = [SFPEntry(f) for _ in range(self.entry_count)]
+            record["bytes"] = sum(entry.data_size for entry in self.entries)
+            record["items"] = self.entry_count
 
     def unpack(
         self, out_dir: str
@@ -29,20 +39,26 @@ class SFP:
         print(f"Extracting files from {self.filepath}...")
         Path(out_dir).mkdir(parents=True, exist_ok=True)
         types = {}
-        for entry in self.entries:
-            if entry.file_type not in types:
-                Path(out_dir, self.filename + extensions[entry.file_type]).write_bytes(
-                    entry.data
-                )
-                types[entry.file_type] = 1
-            else:
-                Path(
-                    out_dir,
-                    self.filename
-                    + f"{types[entry.file_type]}"
-                    + extensions[entry.file_type],
-                ).write_bytes(entry.data)
-                types[entry.file_type] += 1
+        with timings.phase(
+            "write",
+            sum(entry.data_size for entry in self.entries),
+            self.entry_count,
+            self.filename,
+        ):
+            for entry in self.entries:
+                if entry.file_type not in types:
+                    Path(
+                        out_dir, self.filename + extensions[entry.file_type]
+                    ).write_bytes(entry.data)
+                    types[entry.file_type] = 1
+                else:
+                    Path(
+                        out_dir,
+                        self.filename
+                        + f"{types[entry.file_type]}"
+                        + extensions[entry.file_type],
+                    ).write_bytes(entry.data)
+                    types[entry.file_type] += 1
 
     def import_files(self, in_dir: str):
         types = {}
@@ -62,23 +78,29 @@ class SFP:
 
             if lookup_path.exists():
                 print(f"Importing {lookup_path} to {self.filepath}...")
-                newdata = open(lookup_path, "rb").read()
+                with timings.phase("read", items=1, file=self.filename) as record:
+                    newdata = open(lookup_path, "rb").read()
+                    record["bytes"] = len(newdata)
                 entry.import_data(newdata)
 
     def save(self, filepath: str):
-        with EndianBinaryFileWriter(filepath) as f:
-            f.write(MAGIC)
-            f.write_UInt32(self.unk)
-            f.write_UInt32(self.entry_count)
-            for entry in self.entries:
-                entry.write_info(f)
-            for idx, entry in enumerate(self.entries):
-                offset = f.tell()
-                f.write(entry.data)
-                f.pad(0x10)
-                f.seek(0x10 + 0x10 * idx)
-                f.write_UInt32(offset)
-                f.seek(0, 2)
+        with timings.phase(
+            "write", items=self.entry_count, file=self.filename
+        ) as record:
+            with EndianBinaryFileWriter(filepath) as f:
+                f.write(MAGIC)
+                f.write_UInt32(self.unk)
+                f.write_UInt32(self.entry_count)
+                for entry in self.entries:
+                    entry.write_info(f)
+                for idx, entry in enumerate(self.entries):
+                    offset = f.tell()
+                    f.write(entry.data)
+                    f.pad(0x10)
+                    f.seek(0x10 + 0x10 * idx)
+                    f.write_UInt32(offset)
+                    f.seek(0, 2)
+                record["bytes"] = f.tell()
 
 
 class SFPEntry:
@@ -120,10 +142,13 @@ def batch_import_sfp(input_dir: str, extracted_dir: str):
 
 def main():
     args = sys.argv
-    if args[1] == "-e":
-        batch_export_sfp(args[2], args[3])
-    elif args[1] == "-i":
-        batch_import_sfp(args[2], args[3])
+    timings_path = pop_option(args, "--timings")
+    profile_path = pop_option(args, "--profile")
+    with instrumented(timings_path, profile_path):
+        if args[1] == "-e":
+            batch_export_sfp(args[2], args[3])
+        elif args[1] == "-i":
+            batch_import_sfp(args[2], args[3])
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import mmap
 import struct
 from io import BytesIO, StringIO
 
@@ -91,6 +92,30 @@ class EndianBinaryFileReader(EndianBinaryReader):
         self.file.close()
 
 
+class EndianBinaryMappedReader(EndianBinaryReader):
+    def __init__(self, filepath: str, endianness: str = "little"):
+        self.set_endianness(endianness)
+        self.filepath = filepath
+        self.file = open(self.filepath, mode="rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.read = self.mmap.read
+        self.tell = self.mmap.tell
+        self.seek = self.mmap.seek
+
+    def view(self, offset: int, size: int) -> memoryview:
+        return memoryview(self.mmap)[offset : offset + size]
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class EndianBinaryStreamReader(EndianBinaryReader):
     def __init__(self, stream: bytes, endianness: str = "little"):
         self.set_endianness(endianness)
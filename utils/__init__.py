@@ -2,4 +2,11 @@ from .EndianReader import *
 from .TextReader import *
 from .EndianWriter import *
 from .font import *
+from .codec import *
+from .timings import *
 from .utils import *
+from .manifest import *
+from .profile import *
+from .table import *
+from .memory import *
+from .project import *
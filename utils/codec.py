@@ -0,0 +1,136 @@
+from array import array
+import re
+import sys
+
+
+class TextCodec:
+    # tables built once per game profile to convert text from and to the
+    # custom MAGES encoding
+    def __init__(self, settings: dict, font: str, op_codes: dict, buttons: dict):
+        self.settings, self.font, self.op_codes, self.buttons = (
+            settings,
+            font,
+            op_codes,
+            buttons,
+        )
+        self.bytes_per_char = settings["bytes_per_char"]
+        if self.bytes_per_char == 2:
+            self.char_base, self.char_typecode = 0x8000, "H"  # 16 bits per char
+        elif self.bytes_per_char == 4:
+            self.char_base, self.char_typecode = 0x80_00_00_00, "I"  # 32 bits per char
+        assert (
+            array(self.char_typecode).itemsize == self.bytes_per_char
+        ), "Unsupported number of bytes per char"
+        # chars start with a byte in 0x80-0xFE, 0xFF always ends the string
+        self.char_run = re.compile(
+            b"(?:[\x80-\xfe][\x00-\xff]{%d})+" % (self.bytes_per_char - 1), re.S
+        )
+        self.chars = [
+            f"<{buttons[idx]}>" if char == chr(0x3000) and idx in buttons else char
+            for idx, char in enumerate(font)
+        ]
+        self.unknown_char_ids = {
+            idx for idx, char in enumerate(self.chars) if char == " " and idx != 63
+        }
+        # byte value -> (tag name, argument count) for op codes
+        self.op_table = [None] * 0x100
+        for val, (name, arg_count) in op_codes.items():
+            if 0 < val < 0x80 and val not in [1, 2]:
+                self.op_table[val] = (name, arg_count)
+
+        # char -> encoded bytes, the first one wins when a char is in the font twice
+        self.char_bytes = {}
+        for idx, char in enumerate(font):
+            self.char_bytes.setdefault(char, self.encode_char(idx))
+        self.char_bytes["\n"] = b"\x00"
+        self.char_bytes["\r"] = b""
+        # tag name -> encoded bytes, op codes take precedence over buttons
+        self.tag_bytes = {name: self.encode_char(idx) for idx, name in buttons.items()}
+        self.tag_bytes |= {name: bytes([val]) for val, (name, _) in op_codes.items()}
+        self.token_re = re.compile(r"<([^>]*)>|([^<]+)|(<)", re.S)
+
+    def encode_char(self, idx: int) -> bytes:
+        return (self.char_base + idx).to_bytes(self.bytes_per_char, "big")
+
+    def decode(self, data: bytes, pos: int, unknown_ids: set) -> tuple[str, int, int]:
+        # decodes the string at pos, returns it with the value that ended it
+        # and the position after that value
+        out_string = []
+        color_flag = False
+        val = data[pos]
+        while True:
+
+            if val in (1, 2, 0xFF):
+                break
+
+            elif val >= 0x80:  # run of chars, decoded at once
+                end = self.char_run.match(data, pos).end()
+                codes = array(self.char_typecode, data[pos:end])
+                if sys.byteorder == "little":
+                    codes.byteswap()
+                ids = list(map(self.char_base.__rsub__, codes))
+                try:
+                    out_string.append("".join(map(self.chars.__getitem__, ids)))
+                except IndexError:
+                    idx = max(ids)
+                    raise AssertionError(
+                        f"Char number {idx} is beyond font table length"
+                    )
+                if self.unknown_char_ids:
+                    unknown_ids |= self.unknown_char_ids.intersection(ids)
+                pos = end
+
+            elif val == 0:
+                out_string.append("\n")
+                pos += 1
+
+            elif self.op_table[val] is not None:
+                name, arg_count = self.op_table[val]
+
+                if (
+                    val == 4 and self.settings["asymetrical_color_code"]
+                ):  # in Famicom Detective Club, text color op codes have 4 arguments then 3 (annoying)
+                    if color_flag:
+                        color_flag = False
+                    else:
+                        arg_count = 4
+                        color_flag = True
+
+                if arg_count == 0:
+                    out_string.append(f"<{name}>")
+                else:
+                    args = data[pos + 1 : pos + 1 + arg_count]
+                    out_string.append(f"<{name}:{','.join(map(str, args))}>")
+                pos += 1 + arg_count
+
+            else:
+                raise Exception(f"Unknown code value {val} at offset {hex(pos)}")
+
+            val = data[pos]
+        return "".join(out_string), val, pos + 1
+
+    def encode(self, string: str, out: bytearray):
+        # appends the encoded string to out
+        for match in self.token_re.finditer(string):
+            code, text, unclosed = match.groups()
+            if text is not None:
+                try:
+                    out += b"".join(map(self.char_bytes.__getitem__, text))
+                except KeyError:  # slow path, to warn about each missing char
+                    for char in text:
+                        if char in self.char_bytes:
+                            out += self.char_bytes[char]
+                        else:
+                            print(
+                                f"WARNING: The character {char} isn't in the font.txt file, it must be added. It has been ignored."
+                            )
+            elif code is not None:
+                name = code.split(":")[0]
+                if name not in self.tag_bytes:
+                    raise Exception(f"Unknown tag {code}")
+                out += self.tag_bytes[name]
+                if ":" in code:
+                    args = code.split(":")[1].split(",")
+                    out += bytes(int(arg) for arg in args)
+            else:
+                raise EOFError("Error while reading text file: EOF reached")
@@ -2,12 +2,10 @@ from pathlib import Path
 
 
 def load_font_txt(game_code: str):
-    return (
-        open(Path("profiles", game_code, "font.txt"), mode="r", encoding="utf-8-sig")
-        .read()
-        .replace("\n", "")
-        .replace("\r", "")
-    )
+    with open(
+        Path("profiles", game_code, "font.txt"), mode="r", encoding="utf-8-sig"
+    ) as f:
+        return f.read().replace("\n", "").replace("\r", "")
 
 
 def write_font_txt(game_code: str, chars: str):
@@ -0,0 +1,56 @@
+from pathlib import Path
+import hashlib
+import json
+import os
+
+
+def new_hash():
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_bytes(data: bytes) -> str:
+    digest = new_hash()
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def hash_file(filepath: str) -> str:
+    digest = new_hash()
+    with open(filepath, mode="rb") as f:
+        while chunk := f.read(0x100000):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stamp(filepath: str) -> list[int]:
+    stat = os.stat(filepath)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def is_unchanged(record: dict | None, filepath: str) -> bool:
+    # record is {"hash": ..., "stamp": ...}, only hash files whose stamp moved
+    if record is None:
+        return False
+    stamp = file_stamp(filepath)
+    if record["stamp"] == stamp:
+        return True
+    if record["stamp"][0] == stamp[0] and record["hash"] == hash_file(filepath):
+        record["stamp"] = stamp
+        return True
+    return False
+
+
+class Manifest:
+    def __init__(self, filepath: str):
+        self.filepath = Path(filepath)
+        self.data = {}
+        if self.filepath.is_file():
+            with open(self.filepath, mode="r", encoding="utf-8") as f:
+                self.data = json.load(f)
+
+    def save(self):
+        self.filepath.parent.mkdir(exist_ok=True, parents=True)
+        tmp_path = self.filepath.with_name(self.filepath.name + ".tmp")
+        with open(tmp_path, mode="w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.filepath)
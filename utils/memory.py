@@ -0,0 +1,81 @@
+from .manifest import hash_bytes
+from .table import read_table, write_table
+from pathlib import Path
+import json
+
+# translation memory of a set of msb/scx files: every unique string is stored
+# once, with the list of the entries where it appears
+STRINGS_NAME = "strings"
+STRINGS_INDEX_NAME = "strings_index.json"
+STRINGS_COLUMNS = ["Hash", "Count", "Original", "Translation"]
+
+
+def string_hash(string: str) -> str:
+    return hash_bytes(string.encode("utf-8"))
+
+
+class TranslationMemory:
+    def __init__(self):
+        self.strings = {}  # hash -> original string
+        self.translations = {}  # hash -> translated string
+        self.occurrences = {}  # hash -> [[filename, entry idx], ...]
+        self.speakers = {}  # filename -> original speaker of every entry
+
+    def add_file(self, filename: str, entries: list):
+        # entries are the (string, speaker) of every entry of the file
+        self.speakers[filename] = [speaker for _, speaker in entries]
+        for idx, (string, _) in enumerate(entries):
+            if string == "":
+                continue
+            key = string_hash(string)
+            if key not in self.strings:
+                self.strings[key] = string
+                self.translations[key] = string
+                self.occurrences[key] = []
+            self.occurrences[key].append([filename, idx])
+
+    def get_file_strings(self) -> dict:
+        # translated string of every entry of every file, None for empty entries
+        strings = {
+            filename: [None] * len(speakers)
+            for filename, speakers in self.speakers.items()
+        }
+        for key, occurrences in self.occurrences.items():
+            for filename, idx in occurrences:
+                strings[filename][idx] = self.translations[key]
+        return strings
+
+    def save(self, dir: str, fmt: str = "xlsx"):
+        data = (
+            [key, str(len(self.occurrences[key])), string, self.translations[key]]
+            for key, string in self.strings.items()
+        )
+        write_table(Path(dir, STRINGS_NAME + "." + fmt), STRINGS_COLUMNS, data)
+        with open(Path(dir, STRINGS_INDEX_NAME), mode="w", encoding="utf-8") as f:
+            json.dump(
+                {"occurrences": self.occurrences, "speakers": self.speakers},
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, dir: str, fmt: str = "xlsx"):
+        memory = cls()
+        with open(Path(dir, STRINGS_INDEX_NAME), mode="r", encoding="utf-8") as f:
+            index = json.load(f)
+        memory.occurrences = index["occurrences"]
+        memory.speakers = index["speakers"]
+        table = read_table(Path(dir, STRINGS_NAME + "." + fmt))
+        for key, string, translation in zip(
+            table["Hash"], table["Original"], table["Translation"]
+        ):
+            if key not in memory.occurrences:
+                raise Exception(f"Error: unknown string hash {key} in {STRINGS_NAME}")
+            memory.strings[key] = string
+            memory.translations[key] = translation
+        missing = memory.occurrences.keys() - memory.translations.keys()
+        if len(missing) != 0:
+            raise Exception(
+                f"Error: {len(missing)} string(s) are missing from {STRINGS_NAME}"
+            )
+        return memory
@@ -0,0 +1,51 @@
+from .codec import TextCodec
+from .font import load_font_txt
+from .manifest import file_stamp, hash_file, new_hash
+from pathlib import Path
+import json
+
+PROFILE_FILES = ["buttons.json", "op_codes.json", "settings.json", "font.txt"]
+
+
+class Profile:
+    def __init__(self, game_code: str):
+        self.game_code = game_code
+        self.path = Path("profiles") / game_code
+        assert (
+            self.path.is_dir()
+        ), f"Error: No profile found for this game code: {game_code}"
+        self.stamps = self.get_stamps()
+        self.font = load_font_txt(game_code)
+        self.buttons = {int(k): v for k, v in self.load_json("buttons.json").items()}
+        self.op_codes = {int(k): v for k, v in self.load_json("op_codes.json").items()}
+        self.settings = self.load_json("settings.json")
+        self.codec = TextCodec(self.settings, self.font, self.op_codes, self.buttons)
+
+    def load_json(self, filename: str):
+        with open(self.path / filename, mode="r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_stamps(self) -> list:
+        return [file_stamp(self.path / filename) for filename in PROFILE_FILES]
+
+    def is_outdated(self) -> bool:
+        return self.get_stamps() != self.stamps
+
+
+profiles = {}
+
+
+def load_profile(game_code: str) -> Profile:
+    # profiles are loaded once per process, and reloaded if a file changed
+    profile = profiles.get(game_code)
+    if profile is None or profile.is_outdated():
+        profile = profiles[game_code] = Profile(game_code)
+    return profile
+
+
+def get_profile_digest(game_code: str) -> str:
+    # hash of the content of the profile files
+    digest = new_hash()
+    for filename in PROFILE_FILES:
+        digest.update(bytes.fromhex(hash_file(Path("profiles") / game_code / filename)))
+    return digest.hexdigest()
@@ -0,0 +1,116 @@
+from pathlib import Path
+import sqlite3
+
+# sqlite database holding the text of all the msb/scx files of a project,
+# an alternative to one sheet per file. Entries whose translation, speaker
+# translation or static code is modified are marked dirty until imported
+PROJECT_NAME = "project.db"
+
+
+class ProjectStore:
+    def __init__(self, filepath: str):
+        self.filepath = Path(filepath)
+        self.db = sqlite3.connect(self.filepath)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS files"
+                "(name TEXT PRIMARY KEY, profile TEXT, hash TEXT, size INTEGER,"
+                " mtime INTEGER)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS entries"
+                "(file TEXT, idx INTEGER, type TEXT, speaker_original TEXT,"
+                " speaker_translation TEXT, original TEXT, translation TEXT,"
+                " static_code TEXT, dirty INTEGER DEFAULT 0,"
+                " PRIMARY KEY (file, idx))"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_dirty ON entries(file) WHERE dirty"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS speakers"
+                "(original TEXT PRIMARY KEY, translation TEXT)"
+            )
+            self.db.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_modified"
+                " AFTER UPDATE OF speaker_translation, translation, static_code"
+                " ON entries WHEN old.speaker_translation IS NOT new.speaker_translation"
+                " OR old.translation IS NOT new.translation"
+                " OR old.static_code IS NOT new.static_code"
+                " BEGIN UPDATE entries SET dirty = 1"
+                " WHERE file = new.file AND idx = new.idx; END"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_file(self, name: str, rows: list):
+        # rows are the (type, speaker, string, static code) of every entry
+        with self.db:
+            self.db.execute("DELETE FROM entries WHERE file = ?", (name,))
+            self.db.executemany(
+                "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (
+                    (name, idx, type, speaker, speaker, string, string, static_code)
+                    for idx, (type, speaker, string, static_code) in enumerate(rows)
+                ),
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, NULL, NULL, NULL, NULL)",
+                (name,),
+            )
+
+    def write_speakers(self, speakers: list):
+        with self.db:
+            self.db.execute("DELETE FROM speakers")
+            self.db.executemany(
+                "INSERT INTO speakers VALUES (?, ?)",
+                ((speaker, speaker) for speaker in speakers),
+            )
+
+    def convert_speakers(self) -> int:
+        # returns the number of entries whose speaker translation changed
+        with self.db:
+            return self.db.execute(
+                "UPDATE entries SET speaker_translation = speakers.translation"
+                " FROM speakers WHERE entries.speaker_original = speakers.original"
+                " AND entries.speaker_translation IS NOT speakers.translation"
+            ).rowcount
+
+    def get_files(self) -> dict:
+        # name -> (profile, {"hash", "stamp"} of the last imported binary)
+        return {
+            name: (
+                profile,
+                None if hash is None else {"hash": hash, "stamp": [size, mtime]},
+            )
+            for name, profile, hash, size, mtime in self.db.execute(
+                "SELECT * FROM files"
+            )
+        }
+
+    def get_rows(self, name: str, dirty_only: bool = False) -> list:
+        # returns the (idx, speaker translation, translation, static code) of
+        # the entries of a file
+        query = (
+            "SELECT idx, speaker_translation, translation, static_code FROM entries"
+            " WHERE file = ?"
+        )
+        if dirty_only:
+            query += " AND dirty"
+        return self.db.execute(query + " ORDER BY idx", (name,)).fetchall()
+
+    def set_imported(self, name: str, profile: str, record: dict):
+        with self.db:
+            self.db.execute("UPDATE entries SET dirty = 0 WHERE file = ?", (name,))
+            self.db.execute(
+                "UPDATE files SET profile = ?, hash = ?, size = ?, mtime = ?"
+                " WHERE name = ?",
+                (profile, record["hash"], *record["stamp"], name),
+            )
@@ -0,0 +1,133 @@
+# spreadsheet-like files holding named columns of strings, the format is
+# chosen from the file suffix
+import csv
+import json
+from pathlib import Path
+
+TABLE_FORMATS = ["xlsx", "tsv", "jsonl", "parquet"]
+
+
+def table_format(filepath: str) -> str:
+    fmt = Path(filepath).suffix.lower()[1:]
+    if fmt not in TABLE_FORMATS:
+        raise Exception(f"Error: unsupported table format {fmt}")
+    return fmt
+
+
+def write_table(filepath: str, columns: list, rows: list):
+    match table_format(filepath):
+        case "xlsx":
+            write_xlsx(filepath, columns, rows)
+        case "tsv":
+            with open(filepath, mode="w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+                writer.writerow(columns)
+                writer.writerows(rows)
+        case "jsonl":
+            with open(filepath, mode="w", encoding="utf-8", newline="\n") as f:
+                for row in rows:
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    f.write("\n")
+        case "parquet":
+            pa, pq = import_pyarrow()
+            rows = list(rows)
+            data = {
+                name: [row[idx] for row in rows] for idx, name in enumerate(columns)
+            }
+            pq.write_table(
+                pa.table(data, pa.schema([(name, pa.string()) for name in columns])),
+                filepath,
+            )
+
+
+def read_table(filepath: str) -> dict[str, list[str]]:
+    # returns the columns by name, cells are read as strings like
+    # pandas.read_excel(index_col=0, dtype=str, na_filter=False)
+    match table_format(filepath):
+        case "xlsx":
+            return read_xlsx(filepath)
+        case "tsv":
+            with open(filepath, mode="r", encoding="utf-8", newline="") as f:
+                rows = csv.reader(f, delimiter="\t")
+                names = next(rows, [])
+                columns = [[] for _ in names]
+                for row in rows:
+                    if len(row) == 0:
+                        continue
+                    row = row + [""] * (len(names) - len(row))
+                    for column, value in zip(columns, row):
+                        column.append(value)
+            return dict(zip(names, columns))
+        case "jsonl":
+            with open(filepath, mode="r", encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip() != ""]
+            names = list(rows[0].keys()) if len(rows) > 0 else []
+            return {name: [to_cell(row.get(name)) for row in rows] for name in names}
+        case "parquet":
+            pa, pq = import_pyarrow()
+            table = pq.read_table(filepath)
+            return {
+                name: [to_cell(value) for value in table.column(name).to_pylist()]
+                for name in table.column_names
+            }
+
+
+def to_cell(value) -> str:
+    return "" if value is None else str(value)
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception("Error: the parquet format needs pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+# xlsx files have the same layout as pandas' to_excel (index in the first
+# column, header in the first row), and are streamed with openpyxl
+
+
+def write_xlsx(filepath: str, columns: list, rows: list):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    side = Side(style="thin")
+    header = []
+    for value in [None, *columns]:
+        cell = WriteOnlyCell(sheet, value)
+        cell.font = Font(bold=True)
+        cell.border = Border(left=side, right=side, top=side, bottom=side)
+        cell.alignment = Alignment(horizontal="center", vertical="top")
+        header.append(cell)
+    sheet.append(header)
+    for idx, row in enumerate(rows):
+        sheet.append([idx, *row])
+    workbook.save(filepath)
+
+
+def read_xlsx(filepath: str) -> dict[str, list[str]]:
+    from openpyxl import load_workbook
+
+    # cached values of formulas, and the real size of the sheet instead of
+    # its (possibly stale) dimension tag, like pandas
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        names = next(rows, ())[1:]
+        columns = [[] for _ in names]
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            row = row[1:] + (None,) * (len(names) + 1 - len(row))
+            for column, value in zip(columns, row):
+                column.append(to_cell(value))
+    finally:
+        workbook.close()
+    return dict(zip(names, columns))
@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+import cProfile
+import json
+import sys
+import threading
+import time
+
+# wall time, bytes and item counts of the phases of a command (--timings),
+# in total and per file. Nothing is recorded unless enabled
+
+
+class Timings:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.files = {}
+
+    def add(self, phase: str, seconds: float, size: int = 0, items: int = 0, file=None):
+        if not self.enabled:
+            return
+        with self.lock:
+            targets = [self.phases]
+            if file is not None:
+                targets.append(self.files.setdefault(str(file), {}))
+            for target in targets:
+                record = target.setdefault(
+                    phase, {"seconds": 0.0, "bytes": 0, "items": 0}
+                )
+                record["seconds"] += seconds
+                record["bytes"] += size
+                record["items"] += items
+
+    @contextmanager
+    def phase(self, phase: str, size: int = 0, items: int = 0, file=None):
+        # the yielded record can be updated when the size is only known after
+        record = {"bytes": size, "items": items}
+        start = time.perf_counter()
+        yield record
+        self.add(
+            phase, time.perf_counter() - start, record["bytes"], record["items"], file
+        )
+
+    def dump(self) -> dict:
+        return {"phases": self.phases, "files": self.files}
+
+    def merge(self, data: dict):
+        # adds the timings dumped by another process
+        for phase, record in data["phases"].items():
+            self.add(phase, record["seconds"], record["bytes"], record["items"])
+        with self.lock:
+            for file, phases in data["files"].items():
+                for phase, record in phases.items():
+                    total = self.files.setdefault(file, {}).setdefault(
+                        phase, {"seconds": 0.0, "bytes": 0, "items": 0}
+                    )
+                    for key in total:
+                        total[key] += record[key]
+
+    def save(self, filepath: str, total: float, failed: bool = False):
+        report = {
+            "command": sys.argv,
+            "total_seconds": total,
+            "failed": failed,
+            **self.dump(),
+        }
+        with open(filepath, mode="w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+
+
+timings = Timings()
+
+
+def call_with_timings(function, *args):
+    # runs function in a worker process, and returns its result with the
+    # timings recorded during the call
+    timings.enabled = True
+    timings.reset()
+    return function(*args), timings.dump()
+
+
+@contextmanager
+def instrumented(timings_path: str | None = None, profile_path: str | None = None):
+    # records the timings of the enclosed command to timings_path, and dumps
+    # a cProfile of the main process to profile_path
+    if timings_path is not None:
+        timings.enabled = True
+        timings.reset()
+    profiler = None
+    if profile_path is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        total = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f"Profile written to {profile_path}", file=sys.stderr)
+        if timings_path is not None:
+            timings.save(timings_path, total, failed)
+            print(f"Timings written to {timings_path}", file=sys.stderr)
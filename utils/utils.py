@@ -1,6 +1,134 @@
+from .timings import call_with_timings, timings
 from pathlib import Path
+import fnmatch
+import os
+import re
+import sys
 
 
 def has_correct_suffix(path: Path, suffix: str):
     assert suffix[0] == "."
     return path.is_file() and path.suffix.lower() == suffix
+
+
+def pop_option(args: list, name: str, default=None):
+    # removes "name value" from the command line arguments and returns value
+    if name not in args:
+        return default
+    idx = args.index(name)
+    value = args[idx + 1]
+    del args[idx : idx + 2]
+    return value
+
+
+def pop_flag(args: list, name: str) -> bool:
+    # removes a valueless option from the command line arguments
+    if name not in args:
+        return False
+    args.remove(name)
+    return True
+
+
+def pop_options(args: list, name: str) -> list:
+    # same as pop_option, for options that can be given several times
+    values = []
+    while name in args:
+        values.append(pop_option(args, name))
+    return values
+
+
+def compile_patterns(patterns: list):
+    # globs, or regular expressions when prefixed with "re:"
+    if len(patterns) == 0:
+        return None
+    return re.compile(
+        "|".join(
+            (
+                f"(?:{pattern[3:]})"
+                if pattern.startswith("re:")
+                else fnmatch.translate(pattern)
+            )
+            for pattern in patterns
+        )
+    )
+
+
+def path_filter(include: list = [], exclude: list = []):
+    include_re, exclude_re = compile_patterns(include), compile_patterns(exclude)
+
+    def accept(path: str) -> bool:
+        if include_re is not None and not include_re.match(path):
+            return False
+        return exclude_re is None or not exclude_re.match(path)
+
+    return accept
+
+
+def run_jobs(function, tasks: list, jobs: int = 1, processes: bool = False):
+    # yields (task, result, error) for each task, in the order of the tasks
+    if jobs <= 1:
+        for task in tasks:
+            try:
+                yield task, function(*task), None
+            except Exception as e:
+                yield task, None, e
+        return
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    # worker processes send their timings back with the results
+    timed = processes and timings.enabled
+    with executor_class(max_workers=jobs) as executor:
+        futures = [
+            (
+                executor.submit(call_with_timings, function, *task)
+                if timed
+                else executor.submit(function, *task)
+            )
+            for task in tasks
+        ]
+        for task, future in zip(tasks, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                yield task, None, e
+                continue
+            if timed:
+                result, data = result
+                timings.merge(data)
+            yield task, result, None
+
+
+def copy_file_range(src, dst, offset: int, size: int):
+    # copies size bytes from offset in src to the current position of dst,
+    # kernel-side when the platform allows it
+    dst.flush()
+    dst_offset = dst.tell()
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    copied = 0
+    try:
+        if hasattr(os, "copy_file_range"):
+            while copied < size:
+                count = os.copy_file_range(
+                    src_fd, dst_fd, size - copied, offset + copied, dst_offset + copied
+                )
+                if count == 0:
+                    break
+                copied += count
+        elif hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+            os.lseek(dst_fd, dst_offset, os.SEEK_SET)
+            while copied < size:
+                count = os.sendfile(dst_fd, src_fd, offset + copied, size - copied)
+                if count == 0:
+                    break
+                copied += count
+    except OSError:  # unsupported by the filesystem, fall back to plain reads
+        pass
+    dst.seek(dst_offset + copied)
+    src.seek(offset + copied)
+    while copied < size:
+        chunk = src.read(min(size - copied, 0x100000))
+        if not chunk:
+            raise EOFError("Error while copying file data: EOF reached")
+        dst.write(chunk)
+        copied += len(chunk)